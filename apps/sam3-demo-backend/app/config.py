@@ -16,6 +16,20 @@ class Settings:
     load_model_on_startup: bool = (
         os.getenv("SAM3_DEMO_LOAD_MODEL_ON_STARTUP", "0") == "1"
     )
+    warmup_on_startup: bool = os.getenv("SAM3_DEMO_WARMUP_ON_STARTUP", "1") == "1"
+    warmup_frame_width: int = int(os.getenv("SAM3_DEMO_WARMUP_FRAME_WIDTH", "1280"))
+    warmup_frame_height: int = int(os.getenv("SAM3_DEMO_WARMUP_FRAME_HEIGHT", "720"))
+    propagation_prefetch: int = int(os.getenv("SAM3_DEMO_PROPAGATION_PREFETCH", "8"))
+    ws_batch_frames: int = int(os.getenv("SAM3_DEMO_WS_BATCH_FRAMES", "4"))
+    storage_cache_ttl_sec: float = float(os.getenv("SAM3_DEMO_STORAGE_CACHE_TTL_SEC", "5"))
+    cors_origins: tuple[str, ...] = tuple(
+        origin.strip()
+        for origin in os.getenv("SAM3_DEMO_CORS_ORIGINS", "*").split(",")
+        if origin.strip()
+    )
+    cors_max_age_sec: int = int(os.getenv("SAM3_DEMO_CORS_MAX_AGE_SEC", "86400"))
+    frame_cache_mb: int = int(os.getenv("SAM3_DEMO_FRAME_CACHE_MB", "256"))
+    upload_chunk_bytes: int = int(os.getenv("SAM3_DEMO_UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
 
     @property
     def uploads_dir(self) -> Path:
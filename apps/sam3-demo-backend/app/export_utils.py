@@ -1,26 +1,28 @@
 from __future__ import annotations
 
 import io
-import json
+import os
+import shutil
+import sys
 import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache, partial
 from pathlib import Path
+from typing import BinaryIO, Callable
 
 import numpy as np
+from pydantic_core import to_json
 
-from app.mask_codec import mask_to_coco_rle
+from app.mask_codec import MaskRLEDict, coco_rle_area_bbox, mask_to_coco_rle
 from app.models import ExportRequest
 from app.session_store import SessionRecord
 
-try:
-    import torch
-except Exception:  # pragma: no cover
-    torch = None
 
-try:
-    import cv2
-except Exception:  # pragma: no cover
-    cv2 = None
+PNG_COMPRESS_LEVEL = 1
+EXPORT_WORKERS = min(8, os.cpu_count() or 1)
+IMAGE_COPY_CHUNK_BYTES = 1024 * 1024
 
 
 @dataclass(frozen=True)
@@ -37,13 +39,15 @@ class MergeGroupDef:
 
 
 def _to_bool_mask(mask_obj: object) -> np.ndarray:
+    torch = sys.modules.get("torch")
     if torch is not None and isinstance(mask_obj, torch.Tensor):
         arr = mask_obj.detach().to("cpu").numpy()
     else:
         arr = np.asarray(mask_obj)
     if arr.ndim == 3:
         arr = arr[0]
-    return arr.astype(bool)
+    # Export never writes into masks, so bool input is used without a copy.
+    return arr.astype(bool, copy=False)
 
 
 def _bbox_xywh(mask: np.ndarray) -> list[float]:
@@ -57,20 +61,34 @@ def _bbox_xywh(mask: np.ndarray) -> list[float]:
     return [x_min, y_min, x_max - x_min + 1.0, y_max - y_min + 1.0]
 
 
+@lru_cache(maxsize=1)
+def _load_cv2():
+    # Imported on first polygon export rather than with the module; cv2 is
+    # optional and slow to load.
+    try:
+        import cv2
+    except Exception:  # pragma: no cover
+        return None
+    return cv2
+
+
 def _mask_to_yolo_polygon(mask: np.ndarray, width: int, height: int) -> list[float]:
     width = max(1, width)
     height = max(1, height)
+    cv2 = _load_cv2()
     if cv2 is not None:
-        mask_u8 = (mask.astype(np.uint8) * 255).copy()
-        contours, _ = cv2.findContours(mask_u8, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # findContours only distinguishes zero from non-zero, so the 0/1 copy
+        # does not need scaling to 255.
+        contours, _ = cv2.findContours(
+            mask.astype(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+        )
         if contours:
             contour = max(contours, key=cv2.contourArea).reshape(-1, 2)
             if contour.shape[0] >= 3:
-                coords: list[float] = []
-                for x, y in contour:
-                    coords.append(float(x) / width)
-                    coords.append(float(y) / height)
-                return coords
+                # Normalize every vertex in one pass; float64 keeps the values
+                # identical to dividing each coordinate in Python.
+                scale = np.array([width, height], dtype=np.float64)
+                return (contour / scale).ravel().tolist()
 
     x, y, w, h = _bbox_xywh(mask)
     x1 = x / width
@@ -140,24 +158,60 @@ def _apply_merge_mode(
                 merged_masks[obj_id] = mask
 
     for group in merge_defs:
-        combined: np.ndarray | None = None
-        for obj_id in group.obj_ids:
-            mask = frame_masks.get(obj_id)
-            if mask is None:
-                continue
-            combined = mask.copy() if combined is None else np.logical_or(combined, mask)
-        if combined is not None and np.any(combined):
+        members = [frame_masks[obj_id] for obj_id in group.obj_ids if obj_id in frame_masks]
+        if not members:
+            continue
+        # Masks are never mutated downstream, so a lone member is shared as-is;
+        # otherwise one output buffer is OR-ed into in place.
+        combined = members[0]
+        if len(members) > 1:
+            combined = np.logical_or(members[0], members[1])
+            for mask in members[2:]:
+                np.logical_or(combined, mask, out=combined)
+        if np.any(combined):
             merged_masks[group.synthetic_obj_id] = combined
 
     return merged_masks
 
 
+def _coco_geometry(mask: np.ndarray) -> tuple[MaskRLEDict, int, list[float]]:
+    rle = mask_to_coco_rle(mask)
+    areas, bboxes = coco_rle_area_bbox([rle])
+    return rle, areas[0], bboxes[0]
+
+
+def _encode_mask_png(mask: np.ndarray) -> bytes:
+    from PIL import Image
+
+    png_buf = io.BytesIO()
+    # Fast PNG deflate; the zip's own deflate pass recovers most of the size
+    # difference for a fraction of the time.
+    Image.fromarray(mask.astype(np.uint8) * 255, mode="L").save(
+        png_buf, format="PNG", compress_level=PNG_COMPRESS_LEVEL
+    )
+    return png_buf.getvalue()
+
+
 def build_export_archive(
     *,
     record: SessionRecord,
     cached_frame_outputs: dict[int, dict[int, object]],
     req: ExportRequest,
 ) -> bytes:
+    zip_buffer = io.BytesIO()
+    write_export_archive(
+        zip_buffer, record=record, cached_frame_outputs=cached_frame_outputs, req=req
+    )
+    return zip_buffer.getvalue()
+
+
+def write_export_archive(
+    out: BinaryIO,
+    *,
+    record: SessionRecord,
+    cached_frame_outputs: dict[int, dict[int, object]],
+    req: ExportRequest,
+) -> None:
     start_frame, end_frame = _resolve_frame_bounds(record, req)
     meta_by_obj_id = _build_meta_map(req)
     merge_defs = _build_merge_defs(req)
@@ -168,69 +222,138 @@ def build_export_archive(
         )
 
     frames = list(range(start_frame, end_frame + 1))
-    frame_masks_merged: dict[int, dict[int, np.ndarray]] = {}
-    for frame_idx in frames:
-        raw = cached_frame_outputs.get(frame_idx, {})
-        frame_masks = {obj_id: _to_bool_mask(mask) for obj_id, mask in raw.items()}
-        frame_masks_merged[frame_idx] = _apply_merge_mode(
-            frame_masks, req.merge.mode, merge_defs
-        )
+    want_coco = "coco_instance" in req.formats
+    want_yolo = "yolo_segmentation" in req.formats
+    want_png = "binary_masks_png" in req.formats
+    width = max(1, int(record.width))
+    height = max(1, int(record.height))
 
+    # Category ids are handed out in order of first appearance, frame by frame.
     category_id_by_name: dict[str, int] = {}
-    for per_frame in frame_masks_merged.values():
-        for obj_id in per_frame:
-            meta = meta_by_obj_id.get(
-                obj_id,
-                ResolvedObjectMeta(class_name="object", instance_name=f"obj_{obj_id}"),
-            )
-            if meta.class_name not in category_id_by_name:
-                category_id_by_name[meta.class_name] = len(category_id_by_name) + 1
+    coco_images: list[dict[str, object]] = []
+    coco_annotations: list[dict[str, object]] = []
 
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+    with zipfile.ZipFile(out, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
         if req.scope.include_images:
             for frame_idx in frames:
                 frame_path = Path(record.frames_dir) / f"{frame_idx:06d}.jpg"
-                if frame_path.exists():
-                    zf.write(frame_path, arcname=f"images/{frame_idx:06d}.jpg")
+                try:
+                    src = frame_path.open("rb")
+                except FileNotFoundError:
+                    continue
+                with src:
+                    zinfo = zipfile.ZipInfo.from_file(frame_path, f"images/{frame_idx:06d}.jpg")
+                    # JPEG data is already entropy-coded; deflating it only
+                    # burns CPU. Masks stay deflated (see _encode_mask_png).
+                    zinfo.compress_type = zipfile.ZIP_STORED
+                    with zf.open(zinfo, "w") as dst:
+                        shutil.copyfileobj(src, dst, IMAGE_COPY_CHUNK_BYTES)
+
+        # Masks are decoded and merged one frame at a time, so memory holds a
+        # single frame's masks plus a bounded window of in-flight work rather
+        # than the whole range. COCO geometry, YOLO polygons and PNG encodes for
+        # every format run on the pool (numpy reductions, cv2 and Pillow's
+        # deflate release the GIL); results are consumed in FIFO order, which
+        # keeps annotation ids and archive order deterministic.
+        pending: deque[tuple[list[Future], Callable[[list], None]]] = deque()
+
+        def drain(limit: int) -> None:
+            while len(pending) > limit:
+                futures, finish = pending.popleft()
+                finish([future.result() for future in futures])
+
+        def add_annotation(frame_idx, category_id, obj_id, instance_name, results) -> None:
+            rle, area, bbox = results[0]
+            coco_annotations.append(
+                {
+                    "id": len(coco_annotations) + 1,
+                    "image_id": frame_idx + 1,
+                    "category_id": category_id,
+                    "segmentation": rle,
+                    "area": area,
+                    "bbox": bbox,
+                    "iscrowd": 0,
+                    "sam3_obj_id": int(obj_id),
+                    "instance_name": instance_name,
+                }
+            )
 
-        if "coco_instance" in req.formats:
-            coco_images: list[dict[str, object]] = []
-            coco_annotations: list[dict[str, object]] = []
-            ann_id = 1
+        def write_yolo_labels(frame_idx, class_indices, polygons) -> None:
+            lines = [
+                f"{class_idx} " + " ".join(map("{:.6f}".format, polygon))
+                for class_idx, polygon in zip(class_indices, polygons)
+                if len(polygon) >= 6
+            ]
+            zf.writestr(
+                f"annotations/yolo/labels/{frame_idx:06d}.txt", "\n".join(lines) + "\n"
+            )
+
+        def write_entry(arcname, results) -> None:
+            zf.writestr(arcname, results[0])
+
+        window = 2 * EXPORT_WORKERS
+        with ThreadPoolExecutor(max_workers=EXPORT_WORKERS) as pool:
             for frame_idx in frames:
-                coco_images.append(
-                    {
-                        "id": frame_idx + 1,
-                        "file_name": f"{frame_idx:06d}.jpg",
-                        "width": int(record.width),
-                        "height": int(record.height),
-                    }
-                )
-                for obj_id, mask in frame_masks_merged[frame_idx].items():
-                    if not np.any(mask):
-                        continue
+                raw = cached_frame_outputs.get(frame_idx, {})
+                converted = {obj_id: _to_bool_mask(mask) for obj_id, mask in raw.items()}
+                frame_masks = _apply_merge_mode(converted, req.merge.mode, merge_defs)
+
+                yolo_classes: list[int] = []
+                yolo_polygons: list[Future] = []
+                if want_coco:
+                    coco_images.append(
+                        {
+                            "id": frame_idx + 1,
+                            "file_name": f"{frame_idx:06d}.jpg",
+                            "width": int(record.width),
+                            "height": int(record.height),
+                        }
+                    )
+                for obj_id, mask in frame_masks.items():
                     meta = meta_by_obj_id.get(
                         obj_id,
-                        ResolvedObjectMeta(
-                            class_name="object", instance_name=f"obj_{obj_id}"
-                        ),
+                        ResolvedObjectMeta(class_name="object", instance_name=f"obj_{obj_id}"),
                     )
-                    coco_annotations.append(
-                        {
-                            "id": ann_id,
-                            "image_id": frame_idx + 1,
-                            "category_id": category_id_by_name[meta.class_name],
-                            "segmentation": mask_to_coco_rle(mask),
-                            "area": int(mask.sum()),
-                            "bbox": _bbox_xywh(mask),
-                            "iscrowd": 0,
-                            "sam3_obj_id": int(obj_id),
-                            "instance_name": meta.instance_name,
-                        }
+                    category_id = category_id_by_name.setdefault(
+                        meta.class_name, len(category_id_by_name) + 1
                     )
-                    ann_id += 1
+                    if not np.any(mask):
+                        continue
 
+                    if want_coco:
+                        pending.append(
+                            (
+                                [pool.submit(_coco_geometry, mask)],
+                                partial(
+                                    add_annotation,
+                                    frame_idx,
+                                    category_id,
+                                    obj_id,
+                                    meta.instance_name,
+                                ),
+                            )
+                        )
+                    if want_yolo:
+                        yolo_classes.append(category_id - 1)
+                        yolo_polygons.append(
+                            pool.submit(_mask_to_yolo_polygon, mask, width, height)
+                        )
+                    if want_png:
+                        pending.append(
+                            (
+                                [pool.submit(_encode_mask_png, mask)],
+                                partial(write_entry, f"masks/{frame_idx:06d}/obj_{obj_id}.png"),
+                            )
+                        )
+
+                if want_yolo:
+                    pending.append(
+                        (yolo_polygons, partial(write_yolo_labels, frame_idx, yolo_classes))
+                    )
+                drain(window)
+            drain(0)
+
+        if want_coco:
             coco_categories = [
                 {"id": cat_id, "name": name}
                 for name, cat_id in category_id_by_name.items()
@@ -240,55 +363,14 @@ def build_export_archive(
                 "annotations": coco_annotations,
                 "categories": coco_categories,
             }
-            zf.writestr(
-                "annotations/coco_instances.json",
-                json.dumps(coco_payload, indent=2),
-            )
+            zf.writestr("annotations/coco_instances.json", to_json(coco_payload, indent=2))
 
-        if "yolo_segmentation" in req.formats:
+        if want_yolo:
             class_names = [None] * len(category_id_by_name)
             for name, cat_id in category_id_by_name.items():
                 class_names[cat_id - 1] = name
             zf.writestr("annotations/yolo/classes.txt", "\n".join(class_names) + "\n")
 
-            width = max(1, int(record.width))
-            height = max(1, int(record.height))
-            for frame_idx in frames:
-                lines: list[str] = []
-                for obj_id, mask in frame_masks_merged[frame_idx].items():
-                    if not np.any(mask):
-                        continue
-                    meta = meta_by_obj_id.get(
-                        obj_id,
-                        ResolvedObjectMeta(
-                            class_name="object", instance_name=f"obj_{obj_id}"
-                        ),
-                    )
-                    class_idx = category_id_by_name[meta.class_name] - 1
-                    polygon = _mask_to_yolo_polygon(mask, width, height)
-                    if len(polygon) < 6:
-                        continue
-                    line = f"{class_idx} " + " ".join(f"{value:.6f}" for value in polygon)
-                    lines.append(line)
-                zf.writestr(
-                    f"annotations/yolo/labels/{frame_idx:06d}.txt", "\n".join(lines) + "\n"
-                )
-
-        if "binary_masks_png" in req.formats:
-            from PIL import Image
-
-            for frame_idx in frames:
-                for obj_id, mask in frame_masks_merged[frame_idx].items():
-                    if not np.any(mask):
-                        continue
-                    png_buf = io.BytesIO()
-                    Image.fromarray(mask.astype(np.uint8) * 255, mode="L").save(
-                        png_buf, format="PNG"
-                    )
-                    zf.writestr(
-                        f"masks/{frame_idx:06d}/obj_{obj_id}.png", png_buf.getvalue()
-                    )
-
         manifest = {
             "session_id": record.session_id,
             "frame_range": [start_frame, end_frame],
@@ -312,7 +394,4 @@ def build_export_archive(
                 for obj_id, meta in sorted(meta_by_obj_id.items(), key=lambda x: x[0])
             ],
         }
-        zf.writestr("manifest.json", json.dumps(manifest, indent=2))
-
-    zip_buffer.seek(0)
-    return zip_buffer.getvalue()
+        zf.writestr("manifest.json", to_json(manifest, indent=2))
@@ -1,10 +1,20 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
 import logging
 import math
+import secrets
+import threading
 import uuid
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import aclosing, asynccontextmanager
+from functools import partial
 from pathlib import Path
+from typing import BinaryIO, TypeVar
 
+import numpy as np
 from fastapi import (
     Form,
     HTTPException,
@@ -16,13 +26,18 @@ from fastapi import (
     WebSocket,
     WebSocketDisconnect,
 )
+from fastapi.concurrency import run_in_threadpool
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import ValidationError
+from pydantic_core import to_json
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.config import Settings, ensure_directories
 from app.errors import ErrorCode, error_detail, http_error
+from app.mask_codec import ObjectOutputDict
 from app.models import (
     ClickPromptRequest,
     CreateObjectResponse,
@@ -44,15 +59,17 @@ from app.session_store import SessionRecord, SessionStore
 from app.storage_library import StorageLibrary
 from app.video_io import (
     ALLOWED_VIDEO_EXTS,
+    FrameCache,
     cleanup_path,
     compute_processing_fps,
     count_extracted_frames,
     extract_frames,
-    get_frame_path,
+    frame_path_for,
     is_duration_allowed,
     probe_video,
     probe_image_size,
     save_upload_file,
+    write_blank_frame,
 )
 
 
@@ -60,22 +77,94 @@ settings = Settings()
 ensure_directories(settings)
 session_store = SessionStore()
 sam3_service = Sam3Service(session_store=session_store)
-storage_library = StorageLibrary(settings.uploads_dir)
+frame_cache = FrameCache(settings.frame_cache_mb * 1024 * 1024)
+storage_library = StorageLibrary(
+    settings.uploads_dir, cache_ttl_sec=settings.storage_cache_ttl_sec
+)
+# GPU work is serial anyway; one dedicated thread keeps model calls ordered and
+# leaves the shared threadpool free for cheap endpoints like health and frames.
+# Every predictor entry point, propagation streams included, must run here:
+# the predictor and its inference_state are not safe to use from two threads.
+model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sam3-model")
+# A running propagation holds the model thread until it ends, so work queued
+# behind it can never bump the generation in time to stop it. Endpoints that
+# supersede a stream set its event before submitting work instead. Only touched
+# from the event loop.
+propagation_stops: dict[str, threading.Event] = {}
 logger = logging.getLogger(__name__)
+T = TypeVar("T")
+
+FRAME_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # Weights load in the background on the model thread: the server accepts
+    # requests right away, /api/health/ready reports when the model is usable,
+    # and a prompt that arrives early queues behind the load instead of racing it.
+    global model_executor
+    # Shutdown leaves the executor unusable, so each lifespan (several in one
+    # process under tests) starts on a fresh one.
+    model_executor.shutdown(wait=False)
+    model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sam3-model")
+    preload: asyncio.Task | None = None
+    if settings.load_model_on_startup:
+        preload = asyncio.create_task(_preload_predictor())
+    try:
+        yield
+    finally:
+        if preload is not None:
+            preload.cancel()
+        model_executor.shutdown(wait=False, cancel_futures=True)
+
 
-app = FastAPI(title="SAM3 Demo Backend", version="0.1.0")
+app = FastAPI(title="SAM3 Demo Backend", version="0.1.0", lifespan=lifespan)
+# Explicit methods/headers plus max_age let browsers cache the preflight
+# instead of sending an OPTIONS round trip ahead of every prompt.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=list(settings.cors_origins),
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PATCH", "DELETE"],
+    allow_headers=["Content-Type", "X-Request-ID"],
+    expose_headers=["X-Request-ID"],
+    max_age=settings.cors_max_age_sec,
 )
 
 
+class _ApiGZipMiddleware:
+    """GZip JSON API responses, leaving frame JPEGs and export zips untouched."""
+
+    _SKIP_SUFFIXES = (".jpg", "/exports")
+
+    def __init__(self, app: ASGIApp, minimum_size: int, compresslevel: int) -> None:
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and not scope["path"].endswith(self._SKIP_SUFFIXES):
+            await self.gzip(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(_ApiGZipMiddleware, minimum_size=1024, compresslevel=1)
+
+
+# Request ids only correlate log lines: a random per-process prefix keeps them
+# distinct across restarts, and a counter makes each one a single increment.
+# Session and video ids stay full uuid4 since they name files on disk.
+_REQUEST_ID_PREFIX = secrets.token_hex(4)
+_request_id_counter = itertools.count(1)
+
+
+def _new_request_id() -> str:
+    return f"{_REQUEST_ID_PREFIX}{next(_request_id_counter):08x}"
+
+
 @app.middleware("http")
 async def add_request_id(request: Request, call_next):
-    request_id = request.headers.get("X-Request-ID", uuid.uuid4().hex)
+    request_id = request.headers.get("X-Request-ID") or _new_request_id()
     request.state.request_id = request_id
     response = await call_next(request)
     response.headers["X-Request-ID"] = request_id
@@ -84,7 +173,7 @@ async def add_request_id(request: Request, call_next):
 
 @app.exception_handler(HTTPException)
 async def handle_http_exception(request: Request, exc: HTTPException):
-    request_id = getattr(request.state, "request_id", uuid.uuid4().hex)
+    request_id = getattr(request.state, "request_id", None) or _new_request_id()
     if isinstance(exc.detail, dict):
         detail = dict(exc.detail)
     else:
@@ -99,7 +188,7 @@ async def handle_http_exception(request: Request, exc: HTTPException):
 
 @app.exception_handler(RequestValidationError)
 async def handle_validation_exception(request: Request, exc: RequestValidationError):
-    request_id = getattr(request.state, "request_id", uuid.uuid4().hex)
+    request_id = getattr(request.state, "request_id", None) or _new_request_id()
     detail = error_detail(
         ErrorCode.BAD_REQUEST,
         "Invalid request payload",
@@ -115,7 +204,7 @@ async def handle_validation_exception(request: Request, exc: RequestValidationEr
 
 @app.exception_handler(Exception)
 async def handle_unexpected_exception(request: Request, exc: Exception):
-    request_id = getattr(request.state, "request_id", uuid.uuid4().hex)
+    request_id = getattr(request.state, "request_id", None) or _new_request_id()
     logger.exception("Unhandled server error request_id=%s", request_id)
     detail = error_detail(
         ErrorCode.INTERNAL_ERROR,
@@ -147,19 +236,16 @@ def _validate_frame_index(record: SessionRecord, frame_index: int) -> None:
 
 
 def _validate_points(points: list[tuple[float, float, int]]) -> None:
-    for x, y, label in points:
-        if not (0.0 <= x <= 1.0 and 0.0 <= y <= 1.0):
-            raise http_error(
-                400,
-                ErrorCode.INVALID_POINT,
-                "Point coordinates must be normalized between 0 and 1",
-            )
-        if label not in (0, 1):
-            raise http_error(
-                400,
-                ErrorCode.INVALID_POINT,
-                "Point label must be either 0 (negative) or 1 (positive)",
-            )
+    # Labels are already constrained to 0/1 by `PointInput.label`; only the
+    # coordinate range needs checking here.
+    coords = np.asarray(points, dtype=np.float64).reshape(-1, 3)[:, :2]
+    # Comparisons are False for NaN, so non-finite coordinates are rejected too.
+    if not ((coords >= 0.0) & (coords <= 1.0)).all():
+        raise http_error(
+            400,
+            ErrorCode.INVALID_POINT,
+            "Point coordinates must be normalized between 0 and 1",
+        )
 
 
 def _cleanup_active_session() -> None:
@@ -171,6 +257,7 @@ def _cleanup_active_session() -> None:
     except Exception:
         pass
     cleanup_path(active.frames_dir)
+    frame_cache.clear()
     session_store.clear_active()
 
 
@@ -208,7 +295,8 @@ def _start_session_from_video(
         if processing_num_frames <= 0:
             raise RuntimeError("No frames were extracted from video")
 
-        first_frame_path = get_frame_path(frames_dir, 0)
+        # ffmpeg numbers frames from 0, so a non-empty count implies frame 0 exists.
+        first_frame_path = frame_path_for(frames_dir, 0)
         try:
             frame_width, frame_height = probe_image_size(first_frame_path)
         except Exception:
@@ -263,10 +351,179 @@ def _display_name_from_filename(filename: str, fallback: str) -> str:
     return stem if stem else fallback
 
 
-@app.on_event("startup")
-def on_startup() -> None:
-    if settings.load_model_on_startup:
-        sam3_service.load_predictor()
+def _iter_file_chunks(file: BinaryIO, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    try:
+        while chunk := file.read(chunk_size):
+            yield chunk
+    finally:
+        file.close()
+
+
+class _FileStreamingResponse(StreamingResponse):
+    """Stream an open file in chunks and close it however the response ends.
+
+    The generator's ``finally`` never runs if the client disconnects before the
+    body starts, and Starlette skips background tasks on disconnect, so the
+    file is also closed around the whole response.
+    """
+
+    def __init__(self, file: BinaryIO, **kwargs) -> None:
+        super().__init__(_iter_file_chunks(file), **kwargs)
+        self._file = file
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._file.close()
+
+
+def _prompt_response(frame_index: int, objects: list[ObjectOutputDict]) -> Response:
+    # encode_sam3_outputs already produces the PromptResponse shape, so skip
+    # building pydantic models per object and revalidating them on the way out.
+    return Response(
+        content=to_json({"frame_index": frame_index, "objects": objects}),
+        media_type="application/json",
+    )
+
+
+def _serialize_propagation_frames(
+    frames: Iterator[tuple[int, list[ObjectOutputDict]]],
+) -> Iterator[bytes]:
+    # Runs on the producer thread so JSON encoding of the RLE payloads stays off
+    # the event loop; each item is a {"frame_index": ..., "objects": [...]} body.
+    try:
+        for frame_index, objects in frames:
+            yield to_json({"frame_index": frame_index, "objects": objects})
+    finally:
+        close = getattr(frames, "close", None)
+        if close is not None:
+            close()
+
+
+def _propagation_message(batch: list[bytes]) -> str:
+    if len(batch) == 1:
+        return '{"type":"propagation_frame",' + batch[0][1:].decode()
+    return '{"type":"propagation_frames","frames":[' + b",".join(batch).decode() + "]}"
+
+
+async def _watch_disconnect(websocket: WebSocket, cancel: threading.Event) -> None:
+    # The client sends nothing after the start message, so the next receive only
+    # completes when the socket closes. Flag it so propagation stops at the next
+    # frame instead of running the GPU to the end for nobody.
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    except Exception:
+        pass
+    cancel.set()
+
+
+def _stop_propagation(session_id: str | None = None) -> None:
+    # None stops every stream, for paths that replace or close the active session.
+    if session_id is None:
+        events = list(propagation_stops.values())
+    else:
+        events = [propagation_stops.get(session_id)]
+    for event in events:
+        if event is not None:
+            event.set()
+
+
+async def _run_on_model_thread(func: Callable[..., T], /, *args, **kwargs) -> T:
+    # Streaming propagation reaches the same thread via _iterate_in_thread.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(model_executor, partial(func, *args, **kwargs))
+
+
+async def _iterate_in_thread(
+    make_iterator: Callable[[], Iterator[T]],
+    maxsize: int,
+    max_batch: int = 1,
+    executor: Executor | None = None,
+) -> AsyncIterator[list[T]]:
+    """Drive a blocking iterator on a worker thread through a bounded queue.
+
+    The iterator is created and consumed on ``executor`` (the loop's default
+    executor when omitted). The producer thread blocks once ``maxsize`` items
+    are pending, so a slow consumer applies backpressure instead of buffering
+    the whole stream. Each yielded batch holds the next item plus whatever else
+    is already queued, up to ``max_batch`` items, so batching never waits for
+    more data.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+    end = object()
+
+    def put(item: object) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def produce() -> BaseException | None:
+        iterator = make_iterator()
+        try:
+            for item in iterator:
+                if stop.is_set():
+                    break
+                put(item)
+                if stop.is_set():
+                    break
+        except BaseException as exc:
+            return exc
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            put(end)
+        return None
+
+    producer = loop.run_in_executor(executor, produce)
+    try:
+        finished = False
+        while not finished:
+            item = await queue.get()
+            if item is end:
+                break
+            batch = [item]
+            while len(batch) < max_batch and not queue.empty():
+                item = queue.get_nowait()
+                if item is end:
+                    finished = True
+                    break
+                batch.append(item)
+            yield batch
+        error = await producer
+        if error is not None:
+            raise error
+    finally:
+        stop.set()
+        while not producer.done():
+            # Keep draining so a producer blocked on a full queue can observe `stop`.
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({producer, getter}, return_when=asyncio.FIRST_COMPLETED)
+            getter.cancel()
+
+
+async def _preload_predictor() -> None:
+    try:
+        await _run_on_model_thread(sam3_service.load_predictor)
+        if settings.warmup_on_startup:
+            await _run_on_model_thread(_warmup_predictor)
+    except Exception:
+        logger.exception("predictor_preload_failed")
+
+
+def _warmup_predictor() -> None:
+    warmup_dir = settings.tmp_dir / "warmup"
+    try:
+        write_blank_frame(
+            warmup_dir, settings.warmup_frame_width, settings.warmup_frame_height
+        )
+        sam3_service.warmup(warmup_dir)
+    except Exception:
+        logger.warning("predictor_warmup_failed", exc_info=True)
+    finally:
+        cleanup_path(warmup_dir)
 
 
 @app.get("/api/health")
@@ -274,6 +531,13 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/api/health/ready")
+def health_ready() -> JSONResponse:
+    if sam3_service.predictor is None:
+        return JSONResponse(status_code=503, content={"status": "loading"})
+    return JSONResponse(content={"status": "ready"})
+
+
 @app.get("/api/storage/status", response_model=StorageStatusResponse)
 def storage_status() -> StorageStatusResponse:
     payload = storage_library.storage_status(settings.tmp_dir)
@@ -287,13 +551,14 @@ def list_stored_videos() -> StoredVideoListResponse:
 
 
 @app.post("/api/storage/videos/{video_id}/load", response_model=UploadResponse)
-def load_stored_video(video_id: str) -> UploadResponse:
+async def load_stored_video(video_id: str) -> UploadResponse:
     video_path = storage_library.resolve_video_path(video_id)
     if video_path is None:
         raise http_error(404, ErrorCode.BAD_REQUEST, "Stored video not found")
 
     try:
-        return _start_session_from_video(video_path)
+        _stop_propagation()
+        return await _run_on_model_thread(_start_session_from_video, video_path)
     except HTTPException:
         raise
     except Exception as exc:
@@ -315,16 +580,17 @@ def rename_stored_video(video_id: str, req: RenameStoredVideoRequest) -> StoredV
 
 
 @app.post("/api/storage/videos/delete", response_model=DeleteStoredVideosResponse)
-def delete_stored_videos(req: DeleteStoredVideosRequest) -> DeleteStoredVideosResponse:
+async def delete_stored_videos(req: DeleteStoredVideosRequest) -> DeleteStoredVideosResponse:
     video_ids = [video_id.strip() for video_id in req.video_ids if video_id.strip()]
     if len(video_ids) == 0:
         return DeleteStoredVideosResponse(ok=True, deleted=0)
 
     active = session_store.get_active()
-    if active is not None and active.upload_path.stem in set(video_ids):
-        _cleanup_active_session()
+    if active is not None and active.upload_path.stem in video_ids:
+        _stop_propagation()
+        await _run_on_model_thread(_cleanup_active_session)
 
-    deleted = storage_library.delete_videos(video_ids)
+    deleted = await run_in_threadpool(storage_library.delete_videos, video_ids)
     return DeleteStoredVideosResponse(ok=True, deleted=deleted)
 
 
@@ -352,10 +618,12 @@ async def upload_video(
 
     video_id = uuid.uuid4().hex
     upload_path = settings.uploads_dir / f"{video_id}{ext}"
-    await save_upload_file(file, upload_path)
+    await save_upload_file(file, upload_path, chunk_bytes=settings.upload_chunk_bytes)
 
     try:
-        response = _start_session_from_video(
+        _stop_propagation()
+        response = await _run_on_model_thread(
+            _start_session_from_video,
             upload_path,
             requested_processing_fps=processing_fps,
         )
@@ -379,28 +647,38 @@ async def upload_video(
 
 
 @app.get("/api/sessions/{session_id}/frames/{frame_index}.jpg")
-def get_frame(session_id: str, frame_index: int):
+def get_frame(session_id: str, frame_index: int, request: Request):
     record = _require_session(session_id)
     _validate_frame_index(record, frame_index)
+    # Frames live under a per-session directory and never change after
+    # extraction, so the browser may keep them for as long as it likes.
+    headers = {
+        "Cache-Control": FRAME_CACHE_CONTROL,
+        "ETag": f'"{session_id}-{frame_index}"',
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
     try:
-        frame_path = get_frame_path(record.frames_dir, frame_index)
+        content = frame_cache.read(frame_path_for(record.frames_dir, frame_index))
     except FileNotFoundError:
         raise http_error(
             404, ErrorCode.INVALID_FRAME_INDEX, "Frame image not found on disk"
         )
-    return FileResponse(str(frame_path), media_type="image/jpeg")
+    return Response(content=content, media_type="image/jpeg", headers=headers)
 
 
 @app.post("/api/sessions/{session_id}/prompt/text", response_model=PromptResponse)
-def add_text_prompt(session_id: str, req: TextPromptRequest) -> PromptResponse:
+async def add_text_prompt(session_id: str, req: TextPromptRequest) -> Response:
     record = _require_session(session_id)
     _validate_frame_index(record, req.frame_index)
     text = req.text.strip()
     if not text:
         raise http_error(400, ErrorCode.BAD_REQUEST, "Text prompt cannot be empty")
 
+    _stop_propagation(session_id)
     try:
-        frame_index, objects = sam3_service.add_text_prompt(
+        frame_index, objects = await _run_on_model_thread(
+            sam3_service.add_text_prompt,
             session_id=session_id,
             frame_index=req.frame_index,
             text=text,
@@ -420,7 +698,7 @@ def add_text_prompt(session_id: str, req: TextPromptRequest) -> PromptResponse:
             "Text prompt failed",
             details=str(exc),
         )
-    return PromptResponse(frame_index=frame_index, objects=objects)
+    return _prompt_response(frame_index, objects)
 
 
 @app.post("/api/sessions/{session_id}/objects", response_model=CreateObjectResponse)
@@ -431,7 +709,7 @@ def create_object(session_id: str) -> CreateObjectResponse:
 
 
 @app.post("/api/sessions/{session_id}/prompt/clicks", response_model=PromptResponse)
-def add_click_prompt(session_id: str, req: ClickPromptRequest) -> PromptResponse:
+async def add_click_prompt(session_id: str, req: ClickPromptRequest) -> Response:
     record = _require_session(session_id)
     _validate_frame_index(record, req.frame_index)
     if len(req.points) == 0:
@@ -440,8 +718,10 @@ def add_click_prompt(session_id: str, req: ClickPromptRequest) -> PromptResponse
     points = [(point.x, point.y, int(point.label)) for point in req.points]
     _validate_points(points)
 
+    _stop_propagation(session_id)
     try:
-        frame_index, objects = sam3_service.add_click_prompt(
+        frame_index, objects = await _run_on_model_thread(
+            sam3_service.add_click_prompt,
             session_id=session_id,
             frame_index=req.frame_index,
             obj_id=req.obj_id,
@@ -462,28 +742,32 @@ def add_click_prompt(session_id: str, req: ClickPromptRequest) -> PromptResponse
             "Click prompt failed",
             details=str(exc),
         )
-    return PromptResponse(frame_index=frame_index, objects=objects)
+    return _prompt_response(frame_index, objects)
 
 
 @app.post("/api/sessions/{session_id}/objects/{obj_id}/remove", response_model=OperationResponse)
-def remove_object(session_id: str, obj_id: int) -> OperationResponse:
+async def remove_object(session_id: str, obj_id: int) -> OperationResponse:
     _require_session(session_id)
-    sam3_service.remove_object(session_id=session_id, obj_id=obj_id)
+    _stop_propagation(session_id)
+    await _run_on_model_thread(sam3_service.remove_object, session_id=session_id, obj_id=obj_id)
     return OperationResponse(ok=True)
 
 
 @app.post("/api/sessions/{session_id}/reset", response_model=OperationResponse)
-def reset_session(session_id: str) -> OperationResponse:
+async def reset_session(session_id: str) -> OperationResponse:
     _require_session(session_id)
-    sam3_service.reset_session(session_id)
+    _stop_propagation(session_id)
+    await _run_on_model_thread(sam3_service.reset_session, session_id)
     return OperationResponse(ok=True)
 
 
 @app.post("/api/sessions/{session_id}/exports")
-def export_session_data(session_id: str, req: ExportRequest) -> Response:
+async def export_session_data(session_id: str, req: ExportRequest) -> Response:
     record = _require_session(session_id)
     try:
-        archive_bytes = sam3_service.export_session(session_id=session_id, record=record, req=req)
+        archive = await _run_on_model_thread(
+            sam3_service.export_session, session_id=session_id, record=record, req=req
+        )
     except HTTPException:
         raise
     except Exception as exc:
@@ -496,20 +780,22 @@ def export_session_data(session_id: str, req: ExportRequest) -> Response:
         )
 
     filename = f"sam3-export-{session_id[:8]}.zip"
-    return Response(
-        content=archive_bytes,
+    return _FileStreamingResponse(
+        archive,
         media_type="application/zip",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
 @app.delete("/api/sessions/{session_id}", response_model=OperationResponse)
-def delete_session(session_id: str) -> OperationResponse:
+async def delete_session(session_id: str) -> OperationResponse:
     record = _require_session(session_id)
+    _stop_propagation(session_id)
     try:
-        sam3_service.close_session(session_id)
+        await _run_on_model_thread(sam3_service.close_session, session_id)
     finally:
-        cleanup_path(record.frames_dir)
+        await run_in_threadpool(cleanup_path, record.frames_dir)
+        frame_cache.clear()
         session_store.clear_active()
     return OperationResponse(ok=True)
 
@@ -517,8 +803,10 @@ def delete_session(session_id: str) -> OperationResponse:
 @app.websocket("/api/sessions/{session_id}/propagate")
 async def propagate(websocket: WebSocket, session_id: str) -> None:
     await websocket.accept()
-    ws_request_id = uuid.uuid4().hex
+    ws_request_id = _new_request_id()
     start_msg: PropagationStartMessage | None = None
+    cancel = threading.Event()
+    watchdog: asyncio.Task | None = None
     try:
         record = _require_session(session_id)
         start_raw = await websocket.receive_json()
@@ -528,20 +816,35 @@ async def propagate(websocket: WebSocket, session_id: str) -> None:
             _validate_frame_index(record, start_msg.start_frame_index)
 
         generation = session_store.bump_generation(session_id)
-        for frame_index, objects in sam3_service.stream_propagation(
-            session_id=session_id,
-            direction=start_msg.direction,
-            start_frame_index=start_msg.start_frame_index,
-            generation=generation,
-        ):
-            await websocket.send_json(
-                {
-                    "type": "propagation_frame",
-                    "frame_index": frame_index,
-                    "objects": objects,
-                }
-            )
-
+        _stop_propagation(session_id)
+        propagation_stops[session_id] = cancel
+        watchdog = asyncio.create_task(_watch_disconnect(websocket, cancel))
+        frames = _iterate_in_thread(
+            lambda: _serialize_propagation_frames(
+                sam3_service.stream_propagation(
+                    session_id=session_id,
+                    direction=start_msg.direction,
+                    start_frame_index=start_msg.start_frame_index,
+                    generation=generation,
+                    cancel=cancel,
+                )
+            ),
+            maxsize=settings.propagation_prefetch,
+            max_batch=settings.ws_batch_frames,
+            # Propagation drives the predictor, so it runs on the model thread
+            # like every other predictor call and never overlaps them.
+            executor=model_executor,
+        )
+        async with aclosing(frames):
+            async for batch in frames:
+                if cancel.is_set():
+                    break
+                await websocket.send_text(_propagation_message(batch))
+
+        # The watchdog only finishes once the client is gone; a stream stopped
+        # by another endpoint still reports completion.
+        if watchdog.done():
+            return
         await websocket.send_json({"type": "propagation_done"})
     except WebSocketDisconnect:
         return
@@ -572,6 +875,10 @@ async def propagate(websocket: WebSocket, session_id: str) -> None:
             }
         )
     finally:
+        if propagation_stops.get(session_id) is cancel:
+            del propagation_stops[session_id]
+        if watchdog is not None:
+            watchdog.cancel()
         try:
             await websocket.close()
         except RuntimeError:
@@ -1,42 +1,90 @@
 from __future__ import annotations
 
+import sys
+from typing import TypedDict
+
 import numpy as np
 from pycocotools import mask as mask_utils
 
 
-def mask_to_coco_rle(mask: np.ndarray) -> dict[str, object]:
-    mask_u8 = np.asfortranarray(mask.astype(np.uint8))
-    encoded = mask_utils.encode(mask_u8)
-    if isinstance(encoded, list):
-        encoded = encoded[0]
+class MaskRLEDict(TypedDict):
+    size: list[int]
+    counts: str
+
+
+class ObjectOutputDict(TypedDict):
+    obj_id: int
+    score: float
+    bbox_xywh: list[float]
+    mask_rle: MaskRLEDict
+
+
+def _as_array(value: object, dtype: type) -> np.ndarray:
+    # Tensors come back through .numpy(), which shares memory on CPU; asarray
+    # only copies when the dtype actually differs. A tensor can only exist if
+    # torch is already loaded, so it is looked up rather than imported here.
+    torch = sys.modules.get("torch")
+    if torch is not None and isinstance(value, torch.Tensor):
+        value = value.detach().cpu().numpy()
+    return np.asarray(value, dtype=dtype)
+
+
+def _rle_to_dict(encoded: dict[str, object]) -> MaskRLEDict:
+    # pycocotools emits compressed counts as ASCII bytes (chars 48..111); the
+    # ascii codec is the cheapest way to the str the JSON payload needs.
     counts = encoded["counts"]
-    if isinstance(counts, bytes):
-        counts = counts.decode("utf-8")
+    height, width = encoded["size"]
     return {
-        "size": [int(encoded["size"][0]), int(encoded["size"][1])],
-        "counts": str(counts),
+        "size": [int(height), int(width)],
+        "counts": counts.decode("ascii") if isinstance(counts, bytes) else counts,
     }
 
 
-def encode_sam3_outputs(outputs: dict[str, object]) -> list[dict[str, object]]:
-    obj_ids = np.asarray(outputs.get("out_obj_ids", []), dtype=np.int64)
-    scores = np.asarray(outputs.get("out_probs", []), dtype=np.float32)
-    boxes = np.asarray(outputs.get("out_boxes_xywh", []), dtype=np.float32)
-    masks = np.asarray(outputs.get("out_binary_masks", []), dtype=bool)
+def masks_to_coco_rle(masks: np.ndarray) -> list[MaskRLEDict]:
+    if masks.shape[0] == 0:
+        return []
+    # One pycocotools call for the whole (N, H, W) stack. Bool masks reinterpret
+    # as uint8 for free, so the (H, W, N) Fortran layout it wants is the only copy.
+    masks_u8 = masks.view(np.uint8) if masks.dtype == bool else masks.astype(np.uint8)
+    stacked = np.asfortranarray(masks_u8.transpose(1, 2, 0))
+    return [_rle_to_dict(encoded) for encoded in mask_utils.encode(stacked)]
+
+
+def mask_to_coco_rle(mask: np.ndarray) -> MaskRLEDict:
+    return masks_to_coco_rle(mask[np.newaxis])[0]
+
+
+def coco_rle_area_bbox(rles: list[MaskRLEDict]) -> tuple[list[int], list[list[float]]]:
+    # Area and [x, y, w, h] straight from the run lengths, for the whole list in
+    # one call each; this walks the runs rather than rescanning every pixel.
+    if not rles:
+        return [], []
+    areas = mask_utils.area(rles)
+    bboxes = mask_utils.toBbox(rles)
+    return [int(area) for area in areas], bboxes.tolist()
+
+
+def encode_sam3_outputs(outputs: dict[str, object]) -> list[ObjectOutputDict]:
+    obj_ids = _as_array(outputs.get("out_obj_ids", []), np.int64)
+    scores = _as_array(outputs.get("out_probs", []), np.float32)
+    boxes = _as_array(outputs.get("out_boxes_xywh", []), np.float32)
+    masks = _as_array(outputs.get("out_binary_masks", []), bool)
 
     n = min(len(obj_ids), len(scores), len(boxes), len(masks))
-    encoded: list[dict[str, object]] = []
+    if n == 0:
+        return []
+    masks = masks[:n]
+    if masks.ndim == 4:
+        masks = masks[:, 0]
+    rles = masks_to_coco_rle(masks)
+    encoded: list[ObjectOutputDict] = []
     for i in range(n):
-        mask = masks[i]
-        if mask.ndim == 3:
-            mask = mask[0]
-        rle = mask_to_coco_rle(mask)
         encoded.append(
             {
                 "obj_id": int(obj_ids[i]),
                 "score": float(scores[i]),
                 "bbox_xywh": [float(v) for v in boxes[i].tolist()],
-                "mask_rle": rle,
+                "mask_rle": rles[i],
             }
         )
     return encoded
@@ -1,24 +1,37 @@
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import nullcontext
 import logging
 from pathlib import Path
+import tempfile
+import threading
 from typing import Any
 
+import numpy as np
 import torch
-from app.export_utils import build_export_archive
-from app.mask_codec import encode_sam3_outputs
+from app.export_utils import write_export_archive
+from app.mask_codec import ObjectOutputDict, encode_sam3_outputs
 from app.models import ExportRequest
 from app.session_store import SessionRecord, SessionStore
 
 
 logger = logging.getLogger(__name__)
 
+# Exports larger than this spill from memory to a temp file while being built.
+EXPORT_SPOOL_MAX_BYTES = 32 * 1024 * 1024
+# Frames whose masks may be encoding while the predictor works on the next one.
+ENCODE_PIPELINE_DEPTH = 2
+
 
 class Sam3Service:
     def __init__(self, session_store: SessionStore) -> None:
         self.session_store = session_store
         self.predictor = None
+        self._encode_executor = ThreadPoolExecutor(
+            max_workers=ENCODE_PIPELINE_DEPTH, thread_name_prefix="sam3-encode"
+        )
 
     def load_predictor(self) -> None:
         if self.predictor is not None:
@@ -36,6 +49,33 @@ class Sam3Service:
                 "`facebook/sam3`, or set SAM3_DEMO_LOAD_MODEL_ON_STARTUP=0."
             ) from exc
 
+    def warmup(self, frames_dir: Path) -> None:
+        # One text prompt on a blank frame pays for CUDA init and kernel selection
+        # up front instead of on the first user request.
+        predictor = self._ensure_predictor()
+        session_id = "warmup"
+        with self._autocast_context():
+            predictor.handle_request(
+                request={
+                    "type": "start_session",
+                    "session_id": session_id,
+                    "resource_path": str(frames_dir),
+                }
+            )
+            try:
+                predictor.handle_request(
+                    request={
+                        "type": "add_prompt",
+                        "session_id": session_id,
+                        "frame_index": 0,
+                        "text": "object",
+                    }
+                )
+            finally:
+                predictor.handle_request(
+                    request={"type": "close_session", "session_id": session_id}
+                )
+
     def _ensure_predictor(self):
         if self.predictor is None:
             self.load_predictor()
@@ -64,16 +104,19 @@ class Sam3Service:
         frame_index: int,
         text: str,
         reset_first: bool = True,
-    ) -> tuple[int, list[dict[str, object]]]:
+    ) -> tuple[int, list[ObjectOutputDict]]:
         predictor = self._ensure_predictor()
         self.session_store.bump_generation(session_id)
+        # Nothing to undo on a fresh or just-reset session.
+        needs_reset = reset_first and self.session_store.require(session_id).dirty
 
         with self._autocast_context():
-            if reset_first:
+            if needs_reset:
                 predictor.handle_request(
                     request={"type": "reset_session", "session_id": session_id}
                 )
                 self.session_store.clear_click_history(session_id)
+            self.session_store.set_dirty(session_id, True)
 
             logger.info(
                 "text_prompt session_id=%s frame_index=%s text=%s reset_first=%s",
@@ -99,9 +142,12 @@ class Sam3Service:
         frame_index: int,
         obj_id: int,
         points: list[tuple[float, float, int]],
-    ) -> tuple[int, list[dict[str, object]]]:
+    ) -> tuple[int, list[ObjectOutputDict]]:
         predictor = self._ensure_predictor()
-        self._seed_frame_cache_if_needed(session_id=session_id, frame_index=frame_index)
+        self.session_store.set_dirty(session_id, True)
+        self._seed_frame_cache_if_needed(
+            session_id=session_id, frame_index=frame_index, predictor=predictor
+        )
         self.session_store.bump_generation(session_id)
         all_points = self.session_store.add_click_points(
             session_id=session_id,
@@ -116,8 +162,10 @@ class Sam3Service:
             obj_id,
             len(points),
         )
-        point_coords = [[x, y] for x, y, _ in all_points]
-        point_labels = [label for _, _, label in all_points]
+        # Hand the predictor tensors of the dtypes it converts to anyway, so it
+        # skips rebuilding them from nested Python lists.
+        point_coords = torch.from_numpy(np.ascontiguousarray(all_points[:, :2]))
+        point_labels = torch.from_numpy(all_points[:, 2].astype(np.int32))
 
         with self._autocast_context():
             response = predictor.handle_request(
@@ -135,6 +183,7 @@ class Sam3Service:
     def remove_object(self, session_id: str, obj_id: int) -> None:
         predictor = self._ensure_predictor()
         self.session_store.bump_generation(session_id)
+        self.session_store.set_dirty(session_id, True)
         with self._autocast_context():
             predictor.handle_request(
                 request={
@@ -153,6 +202,7 @@ class Sam3Service:
                 request={"type": "reset_session", "session_id": session_id}
             )
         self.session_store.clear_click_history(session_id)
+        self.session_store.set_dirty(session_id, False)
 
     def close_session(self, session_id: str) -> None:
         predictor = self._ensure_predictor()
@@ -167,8 +217,13 @@ class Sam3Service:
         direction: str,
         start_frame_index: int | None,
         generation: int,
+        cancel: threading.Event | None = None,
     ):
         predictor = self._ensure_predictor()
+        # Bumps replace the int on this record, so reading it per frame is a
+        # plain attribute load with no lock; clear_active bumps it too.
+        record = self.session_store.require(session_id)
+        self.session_store.set_dirty(session_id, True)
         self._ensure_cache_entries_for_partial_propagation(
             session_id=session_id,
             predictor=predictor,
@@ -181,16 +236,40 @@ class Sam3Service:
         if start_frame_index is not None:
             request["start_frame_index"] = start_frame_index
 
-        with self._autocast_context():
-            for response in predictor.handle_stream_request(request=request):
-                if not self.session_store.is_generation_current(session_id, generation):
-                    break
-                frame_index = int(response["frame_index"])
-                objects = encode_sam3_outputs(response["outputs"])
-                yield frame_index, objects
+        # Mask encoding for frame N runs on the encode pool while the predictor
+        # computes frame N+1; results are still yielded in stream order.
+        pending: deque[tuple[int, Future]] = deque()
+
+        def is_stale() -> bool:
+            return (cancel is not None and cancel.is_set()) or record.generation != generation
+
+        try:
+            with self._autocast_context():
+                for response in predictor.handle_stream_request(request=request):
+                    if is_stale():
+                        return
+                    pending.append(
+                        (
+                            int(response["frame_index"]),
+                            self._encode_executor.submit(
+                                encode_sam3_outputs, response["outputs"]
+                            ),
+                        )
+                    )
+                    if len(pending) >= ENCODE_PIPELINE_DEPTH:
+                        frame_index, future = pending.popleft()
+                        yield frame_index, future.result()
+            while pending and not is_stale():
+                frame_index, future = pending.popleft()
+                yield frame_index, future.result()
+        finally:
+            # Frames queued behind a stale or abandoned stream are never sent;
+            # drop their encodes instead of running them.
+            for _, future in pending:
+                future.cancel()
 
     def _ensure_cache_entries_for_partial_propagation(self, session_id: str, predictor) -> None:
-        state = self._get_inference_state(session_id)
+        state = self._get_inference_state(session_id, predictor)
         model = getattr(predictor, "model", None)
         if model is None or not hasattr(model, "parse_action_history_for_propagation"):
             return
@@ -213,11 +292,14 @@ class Sam3Service:
         if num_frames <= 0:
             return
 
-        missing_frame_count = 0
-        for frame_idx in range(num_frames):
-            if frame_idx not in cached_frame_outputs:
-                cached_frame_outputs[frame_idx] = {}
-                missing_frame_count += 1
+        # Each placeholder gets its own dict; upstream may fill them in place.
+        missing = {
+            frame_idx: {}
+            for frame_idx in range(num_frames)
+            if frame_idx not in cached_frame_outputs
+        }
+        cached_frame_outputs.update(missing)
+        missing_frame_count = len(missing)
 
         if missing_frame_count > 0:
             logger.info(
@@ -231,9 +313,9 @@ class Sam3Service:
         session_id: str,
         record: SessionRecord,
         req: ExportRequest,
-    ) -> bytes:
+    ) -> tempfile.SpooledTemporaryFile:
         predictor = self._ensure_predictor()
-        state = self._get_inference_state(session_id)
+        state = self._get_inference_state(session_id, predictor)
 
         frame_start = req.scope.frame_start if req.scope.frame_start is not None else 0
         frame_end = (
@@ -244,12 +326,11 @@ class Sam3Service:
         if frame_start > frame_end:
             frame_start, frame_end = frame_end, frame_start
 
+        # Upstream creates this dict once per session and mutates it in place,
+        # so one reference stays valid across the propagation below.
+        cached = state.setdefault("cached_frame_outputs", {})
         if req.auto_propagate_if_incomplete:
-            missing = [
-                idx
-                for idx in range(frame_start, frame_end + 1)
-                if idx not in state.get("cached_frame_outputs", {})
-            ]
+            missing = [idx for idx in range(frame_start, frame_end + 1) if idx not in cached]
             if missing:
                 logger.info(
                     "export_auto_propagate session_id=%s start=%s end=%s missing=%s",
@@ -258,6 +339,7 @@ class Sam3Service:
                     frame_end,
                     len(missing),
                 )
+                self.session_store.set_dirty(session_id, True)
                 with self._autocast_context():
                     for _ in predictor.handle_stream_request(
                         request={
@@ -269,19 +351,26 @@ class Sam3Service:
                     ):
                         pass
 
-        return build_export_archive(
-            record=record,
-            cached_frame_outputs=state.get("cached_frame_outputs", {}),
-            req=req,
-        )
-
-    def _seed_frame_cache_if_needed(self, session_id: str, frame_index: int) -> None:
-        state = self._get_inference_state(session_id)
-        cached = state.get("cached_frame_outputs", {})
+        archive = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES)
+        try:
+            write_export_archive(
+                archive,
+                record=record,
+                cached_frame_outputs=cached,
+                req=req,
+            )
+        except BaseException:
+            archive.close()
+            raise
+        archive.seek(0)
+        return archive
+
+    def _seed_frame_cache_if_needed(self, session_id: str, frame_index: int, predictor) -> None:
+        state = self._get_inference_state(session_id, predictor)
+        cached = state.setdefault("cached_frame_outputs", {})
         if frame_index in cached:
             return
 
-        predictor = self._ensure_predictor()
         model = getattr(predictor, "model", None)
         if model is not None and hasattr(model, "_run_single_frame_inference"):
             logger.info(
@@ -300,7 +389,6 @@ class Sam3Service:
                     exc_info=True,
                 )
 
-        cached = state.get("cached_frame_outputs", {})
         if frame_index in cached:
             return
 
@@ -311,6 +399,10 @@ class Sam3Service:
         )
         try:
             with self._autocast_context():
+                # Only this frame is needed: close the stream after the first
+                # yield so it does not sit suspended on the model. Tracking is
+                # not capped via max_frame_num_to_track, because upstream keeps
+                # that bound in feature_cache for every later inference call.
                 stream = predictor.handle_stream_request(
                     request={
                         "type": "propagate_in_video",
@@ -319,7 +411,10 @@ class Sam3Service:
                         "start_frame_index": frame_index,
                     }
                 )
-                next(stream, None)
+                try:
+                    next(stream, None)
+                finally:
+                    stream.close()
         except Exception:
             logger.warning(
                 "stream_seed_failed session_id=%s frame_index=%s",
@@ -328,14 +423,12 @@ class Sam3Service:
                 exc_info=True,
             )
 
-        cached = state.get("cached_frame_outputs", {})
         if frame_index not in cached:
             raise RuntimeError(
                 f"Unable to seed cache for frame {frame_index}. "
                 "Add a text prompt or run propagation first."
             )
 
-    def _get_inference_state(self, session_id: str) -> dict[str, Any]:
-        predictor = self._ensure_predictor()
+    def _get_inference_state(self, session_id: str, predictor) -> dict[str, Any]:
         session = predictor._get_session(session_id)
         return session["state"]
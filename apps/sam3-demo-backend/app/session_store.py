@@ -4,6 +4,36 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from threading import Lock
 
+import numpy as np
+
+
+class ClickHistory:
+    """Append-only (N, 3) float32 rows of (x, y, label) with amortized growth."""
+
+    __slots__ = ("_buf", "_size")
+
+    def __init__(self, capacity: int = 8) -> None:
+        self._buf = np.empty((max(capacity, 1), 3), dtype=np.float32)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def extend(self, points: list[tuple[float, float, int]]) -> None:
+        rows = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        end = self._size + len(rows)
+        if end > len(self._buf):
+            grown = np.empty((max(end, 2 * len(self._buf)), 3), dtype=np.float32)
+            grown[: self._size] = self._buf[: self._size]
+            self._buf = grown
+        self._buf[self._size : end] = rows
+        self._size = end
+
+    def view(self) -> np.ndarray:
+        # Rows below _size are never rewritten (growth copies into a new
+        # buffer), so the returned view stays valid after later appends.
+        return self._buf[: self._size]
+
 
 @dataclass
 class SessionRecord:
@@ -18,28 +48,33 @@ class SessionRecord:
     source_duration_sec: float
     generation: int = 0
     next_user_obj_id: int = -1
-    click_history: dict[tuple[int, int], list[tuple[float, float, int]]] = field(
-        default_factory=dict
-    )
+    # False while the predictor state is as start_session left it, so a reset
+    # would be a no-op.
+    dirty: bool = False
+    click_history: dict[tuple[int, int], ClickHistory] = field(default_factory=dict)
 
 
 class SessionStore:
+    # Writers serialize on _lock, or on _history_lock for click history, which
+    # no other operation touches. Readers take a single snapshot of _active
+    # (one reference load, atomic in CPython) and read int fields from it, so
+    # hot-path checks such as generation polling never contend for a lock.
     def __init__(self) -> None:
         self._lock = Lock()
+        self._history_lock = Lock()
         self._active: SessionRecord | None = None
 
     def _require_unlocked(self, session_id: str) -> SessionRecord:
-        if self._active is None or self._active.session_id != session_id:
+        active = self._active
+        if active is None or active.session_id != session_id:
             raise KeyError(session_id)
-        return self._active
+        return active
 
     def has_active(self) -> bool:
-        with self._lock:
-            return self._active is not None
+        return self._active is not None
 
     def get_active(self) -> SessionRecord | None:
-        with self._lock:
-            return self._active
+        return self._active
 
     def set_active(self, record: SessionRecord) -> None:
         with self._lock:
@@ -49,11 +84,13 @@ class SessionStore:
         with self._lock:
             old = self._active
             self._active = None
+            if old is not None:
+                # Anything still streaming for this session sees itself as stale.
+                old.generation += 1
             return old
 
     def require(self, session_id: str) -> SessionRecord:
-        with self._lock:
-            return self._require_unlocked(session_id)
+        return self._require_unlocked(session_id)
 
     def bump_generation(self, session_id: str) -> int:
         with self._lock:
@@ -62,9 +99,11 @@ class SessionStore:
             return record.generation
 
     def is_generation_current(self, session_id: str, generation: int) -> bool:
+        return self._require_unlocked(session_id).generation == generation
+
+    def set_dirty(self, session_id: str, dirty: bool) -> None:
         with self._lock:
-            record = self._require_unlocked(session_id)
-            return record.generation == generation
+            self._require_unlocked(session_id).dirty = dirty
 
     def reset_object_counter(self, session_id: str) -> None:
         with self._lock:
@@ -80,22 +119,23 @@ class SessionStore:
 
     def add_click_points(
         self, session_id: str, obj_id: int, frame_index: int, points: list[tuple[float, float, int]]
-    ) -> list[tuple[float, float, int]]:
-        with self._lock:
+    ) -> np.ndarray:
+        """Append points and return all points for (obj_id, frame_index) as (N, 3) float32."""
+        with self._history_lock:
             record = self._require_unlocked(session_id)
-            key = (obj_id, frame_index)
-            existing = record.click_history.get(key, [])
-            existing.extend(points)
-            record.click_history[key] = existing
-            return existing.copy()
+            history = record.click_history.get((obj_id, frame_index))
+            if history is None:
+                history = record.click_history[(obj_id, frame_index)] = ClickHistory()
+            history.extend(points)
+            return history.view()
 
     def clear_click_history(self, session_id: str) -> None:
-        with self._lock:
+        with self._history_lock:
             record = self._require_unlocked(session_id)
             record.click_history.clear()
 
     def clear_click_history_for_obj(self, session_id: str, obj_id: int) -> None:
-        with self._lock:
+        with self._history_lock:
             record = self._require_unlocked(session_id)
             keys = [key for key in record.click_history if key[0] == obj_id]
             for key in keys:
@@ -1,21 +1,44 @@
 from __future__ import annotations
 
-import json
+import math
+import os
 import shutil
+import time
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 from threading import Lock
 
+from pydantic_core import from_json, to_json
+
 from app.video_io import ALLOWED_VIDEO_EXTS
 
 
 def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    return _timestamp_iso(time.time())
 
 
 def _mtime_iso(path: Path) -> str:
-    return datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc).isoformat()
+    return _timestamp_iso(path.stat().st_mtime)
+
+
+@lru_cache(maxsize=1024)
+def _utc_second_iso(second: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+
+
+def _timestamp_iso(timestamp: float) -> str:
+    # Same text as datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(),
+    # without building a datetime per entry; the seconds part is cached since
+    # listings format the same mtimes over and over.
+    second = math.floor(timestamp)
+    micros = round((timestamp - second) * 1_000_000)
+    if micros >= 1_000_000:
+        second += 1
+        micros -= 1_000_000
+    if micros:
+        return f"{_utc_second_iso(second)}.{micros:06d}+00:00"
+    return f"{_utc_second_iso(second)}+00:00"
 
 
 @dataclass(frozen=True)
@@ -29,10 +52,18 @@ class StoredVideo:
 
 
 class StorageLibrary:
-    def __init__(self, uploads_dir: Path) -> None:
+    def __init__(self, uploads_dir: Path, cache_ttl_sec: float = 5.0) -> None:
         self.uploads_dir = uploads_dir
         self.manifest_path = uploads_dir / "library.json"
+        self.cache_ttl_sec = cache_ttl_sec
         self._lock = Lock()
+        # Disk-usage polling never reads the manifest, so it does not wait
+        # behind manifest writes.
+        self._status_lock = Lock()
+        self._videos_cache: tuple[float, list[StoredVideo]] | None = None
+        self._status_cache: dict[Path, tuple[float, dict[str, int | str]]] = {}
+        self._manifest_cache: dict[str, dict[str, str]] | None = None
+        self._manifest_stamp: tuple[int, int] | None = None
 
     def register_video(self, video_id: str, file_name: str, display_name: str) -> None:
         with self._lock:
@@ -45,6 +76,7 @@ class StorageLibrary:
                 "updated_at": now,
             }
             self._save_manifest_unlocked(manifest)
+            self._invalidate_cache_unlocked()
 
     def resolve_video_path(self, video_id: str) -> Path | None:
         with self._lock:
@@ -53,49 +85,74 @@ class StorageLibrary:
 
     def list_videos(self) -> list[StoredVideo]:
         with self._lock:
-            manifest = self._load_manifest_unlocked()
-            listed: list[StoredVideo] = []
-            seen_files: set[str] = set()
-
-            for video_id, entry in manifest.items():
-                file_name = str(entry.get("file_name", ""))
-                if not file_name:
-                    continue
-                path = self.uploads_dir / file_name
-                if not path.exists() or not path.is_file():
-                    continue
-                if path.suffix.lower() not in ALLOWED_VIDEO_EXTS:
-                    continue
-                seen_files.add(file_name)
-                listed.append(
-                    StoredVideo(
-                        video_id=video_id,
-                        file_name=file_name,
-                        display_name=str(entry.get("display_name", video_id)),
-                        size_bytes=path.stat().st_size,
-                        created_at=str(entry.get("created_at", _mtime_iso(path))),
-                        updated_at=str(entry.get("updated_at", _mtime_iso(path))),
-                    )
+            now = time.monotonic()
+            if self._videos_cache is not None:
+                cached_at, cached = self._videos_cache
+                if now - cached_at < self.cache_ttl_sec:
+                    return list(cached)
+            # Rescan once the TTL expires: directory mtimes are too coarse to
+            # key on and do not move when an upload grows in place.
+            listed = self._list_videos_unlocked()
+            self._videos_cache = (now, listed)
+            return list(listed)
+
+    def _list_videos_unlocked(self) -> list[StoredVideo]:
+        manifest = self._load_manifest_unlocked()
+        files = self._scan_uploads_unlocked()
+        listed: list[StoredVideo] = []
+        seen_files: set[str] = set()
+
+        for video_id, entry in manifest.items():
+            file_name = str(entry.get("file_name", ""))
+            st = files.get(file_name)
+            if st is None:
+                continue
+            seen_files.add(file_name)
+            mtime_iso = _timestamp_iso(st.st_mtime)
+            listed.append(
+                StoredVideo(
+                    video_id=video_id,
+                    file_name=file_name,
+                    display_name=str(entry.get("display_name", video_id)),
+                    size_bytes=st.st_size,
+                    created_at=str(entry.get("created_at", mtime_iso)),
+                    updated_at=str(entry.get("updated_at", mtime_iso)),
                 )
+            )
 
-            for path in self.uploads_dir.iterdir():
-                if not path.is_file() or path.name in seen_files:
-                    continue
-                if path.suffix.lower() not in ALLOWED_VIDEO_EXTS:
-                    continue
-                listed.append(
-                    StoredVideo(
-                        video_id=path.stem,
-                        file_name=path.name,
-                        display_name=path.stem,
-                        size_bytes=path.stat().st_size,
-                        created_at=_mtime_iso(path),
-                        updated_at=_mtime_iso(path),
-                    )
+        for file_name, st in files.items():
+            if file_name in seen_files:
+                continue
+            mtime_iso = _timestamp_iso(st.st_mtime)
+            stem = Path(file_name).stem
+            listed.append(
+                StoredVideo(
+                    video_id=stem,
+                    file_name=file_name,
+                    display_name=stem,
+                    size_bytes=st.st_size,
+                    created_at=mtime_iso,
+                    updated_at=mtime_iso,
                 )
+            )
 
-            listed.sort(key=lambda v: v.updated_at, reverse=True)
-            return listed
+        listed.sort(key=lambda v: v.updated_at, reverse=True)
+        return listed
+
+    def _scan_uploads_unlocked(self) -> dict[str, os.stat_result]:
+        # One scandir pass; DirEntry.stat() is a single syscall per file and
+        # replaces the separate exists()/is_file()/stat() probes per path.
+        files: dict[str, os.stat_result] = {}
+        try:
+            with os.scandir(self.uploads_dir) as entries:
+                for entry in entries:
+                    if os.path.splitext(entry.name)[1].lower() not in ALLOWED_VIDEO_EXTS:
+                        continue
+                    if entry.is_file():
+                        files[entry.name] = entry.stat()
+        except FileNotFoundError:
+            pass
+        return files
 
     def rename_video(self, video_id: str, display_name: str) -> StoredVideo | None:
         normalized = display_name.strip()
@@ -126,6 +183,7 @@ class StorageLibrary:
                 "updated_at": now,
             }
             self._save_manifest_unlocked(manifest)
+            self._invalidate_cache_unlocked()
             return StoredVideo(
                 video_id=video_id,
                 file_name=path.name,
@@ -139,39 +197,51 @@ class StorageLibrary:
         deleted = 0
         with self._lock:
             manifest = self._load_manifest_unlocked()
+            # One directory read up front instead of exists()/is_file() per id.
+            with os.scandir(self.uploads_dir) as entries:
+                files = {entry.name for entry in entries if entry.is_file()}
             for video_id in video_ids:
-                path = None
+                file_name = None
                 entry = manifest.get(video_id)
-                if entry is not None:
-                    candidate = self.uploads_dir / str(entry.get("file_name", ""))
-                    if candidate.exists() and candidate.is_file():
-                        path = candidate
-                if path is None:
+                if entry is not None and str(entry.get("file_name", "")) in files:
+                    file_name = str(entry["file_name"])
+                if file_name is None:
                     for ext in ALLOWED_VIDEO_EXTS:
-                        candidate = self.uploads_dir / f"{video_id}{ext}"
-                        if candidate.exists() and candidate.is_file():
-                            path = candidate
+                        if f"{video_id}{ext}" in files:
+                            file_name = f"{video_id}{ext}"
                             break
 
-                if path is not None:
+                if file_name is not None:
                     try:
-                        path.unlink()
+                        (self.uploads_dir / file_name).unlink()
                         deleted += 1
                     except FileNotFoundError:
                         pass
+                    files.discard(file_name)
                 manifest.pop(video_id, None)
             self._save_manifest_unlocked(manifest)
+            self._invalidate_cache_unlocked()
         return deleted
 
     def storage_status(self, storage_root: Path) -> dict[str, int | str]:
+        with self._status_lock:
+            now = time.monotonic()
+            cached = self._status_cache.get(storage_root)
+            if cached is not None and now - cached[0] < self.cache_ttl_sec:
+                return dict(cached[1])
+            status = self._storage_status_unlocked(storage_root)
+            self._status_cache[storage_root] = (now, status)
+            return dict(status)
+
+    def _storage_status_unlocked(self, storage_root: Path) -> dict[str, int | str]:
         root = storage_root if storage_root.exists() else self.uploads_dir
         usage = shutil.disk_usage(root)
-        uploads_bytes = 0
-        uploads_count = 0
-        for path in self.uploads_dir.iterdir():
-            if path.is_file() and path.suffix.lower() in ALLOWED_VIDEO_EXTS:
-                uploads_count += 1
-                uploads_bytes += path.stat().st_size
+        # Totals are rescanned whenever the TTL cache misses: the directory
+        # mtime is too coarse to key on, and it does not move when an existing
+        # upload grows in place.
+        files = self._scan_uploads_unlocked()
+        uploads_count = len(files)
+        uploads_bytes = sum(st.st_size for st in files.values())
         return {
             "storage_root": str(root.resolve()),
             "total_bytes": int(usage.total),
@@ -181,11 +251,30 @@ class StorageLibrary:
             "uploads_count": int(uploads_count),
         }
 
+    def _invalidate_cache_unlocked(self) -> None:
+        self._videos_cache = None
+        with self._status_lock:
+            self._status_cache.clear()
+
     def _load_manifest_unlocked(self) -> dict[str, dict[str, str]]:
-        if not self.manifest_path.exists():
+        # The parsed manifest is reused until library.json changes on disk.
+        # Callers get a shallow copy so in-place edits that are never saved
+        # cannot leak into the cache.
+        try:
+            st = self.manifest_path.stat()
+        except FileNotFoundError:
+            self._manifest_cache = None
+            self._manifest_stamp = None
             return {}
+        stamp = (st.st_mtime_ns, st.st_size)
+        if self._manifest_cache is None or self._manifest_stamp != stamp:
+            self._manifest_cache = self._read_manifest_unlocked()
+            self._manifest_stamp = stamp
+        return dict(self._manifest_cache)
+
+    def _read_manifest_unlocked(self) -> dict[str, dict[str, str]]:
         try:
-            payload = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            payload = from_json(self.manifest_path.read_bytes())
         except Exception:
             return {}
         if not isinstance(payload, dict):
@@ -203,10 +292,13 @@ class StorageLibrary:
 
     def _save_manifest_unlocked(self, manifest: dict[str, dict[str, str]]) -> None:
         self.uploads_dir.mkdir(parents=True, exist_ok=True)
-        self.manifest_path.write_text(
-            json.dumps(manifest, ensure_ascii=True, indent=2, sort_keys=True),
-            encoding="utf-8",
-        )
+        # Write then rename so readers never see a truncated library.json.
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        tmp_path.write_bytes(to_json(manifest))
+        os.replace(tmp_path, self.manifest_path)
+        st = self.manifest_path.stat()
+        self._manifest_cache = dict(manifest)
+        self._manifest_stamp = (st.st_mtime_ns, st.st_size)
 
     def _resolve_video_path_unlocked(
         self, video_id: str, manifest: dict[str, dict[str, str]]
@@ -1,15 +1,23 @@
 from __future__ import annotations
 
-import json
+import hashlib
+import io
+import os
 import shutil
 import subprocess
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from threading import Lock
+from typing import BinaryIO
 
 from fastapi import UploadFile
-
+from fastapi.concurrency import run_in_threadpool
+from pydantic_core import from_json
 
 ALLOWED_VIDEO_EXTS = {".mp4", ".mov", ".avi", ".mkv", ".webm"}
+DEFAULT_UPLOAD_CHUNK_BYTES = 1024 * 1024
 
 
 @dataclass(frozen=True)
@@ -45,7 +53,85 @@ def run_command(cmd: list[str]) -> None:
         raise RuntimeError(f"Command failed: {' '.join(cmd)}\n{proc.stderr}")
 
 
+_PROBE_CACHE_MAX_ENTRIES = 256
+_FINGERPRINT_SAMPLE_BYTES = 64 * 1024
+_probe_cache: OrderedDict[tuple[int, bytes], VideoMetadata] = OrderedDict()
+_probe_cache_lock = Lock()
+
+
+def video_fingerprint(video_path: Path) -> tuple[int, bytes]:
+    # Size plus a hash of the head and tail identifies re-uploads and reloads of
+    # the same clip without reading the whole file; the container header and
+    # index live at those ends.
+    size = video_path.stat().st_size
+    digest = hashlib.blake2b(digest_size=16)
+    with video_path.open("rb") as f:
+        digest.update(f.read(_FINGERPRINT_SAMPLE_BYTES))
+        if size > 2 * _FINGERPRINT_SAMPLE_BYTES:
+            f.seek(-_FINGERPRINT_SAMPLE_BYTES, os.SEEK_END)
+            digest.update(f.read(_FINGERPRINT_SAMPLE_BYTES))
+    return size, digest.digest()
+
+
 def probe_video(video_path: Path) -> VideoMetadata:
+    fingerprint = video_fingerprint(video_path)
+    with _probe_cache_lock:
+        cached = _probe_cache.get(fingerprint)
+        if cached is not None:
+            _probe_cache.move_to_end(fingerprint)
+            return cached
+
+    metadata = _probe_video_av(video_path) or _run_ffprobe_video(video_path)
+    with _probe_cache_lock:
+        _probe_cache[fingerprint] = metadata
+        _probe_cache.move_to_end(fingerprint)
+        while len(_probe_cache) > _PROBE_CACHE_MAX_ENTRIES:
+            _probe_cache.popitem(last=False)
+    return metadata
+
+
+@lru_cache(maxsize=1)
+def _load_av():
+    # Imported on first probe rather than with the module; PyAV is optional
+    # and pulls in the FFmpeg libraries.
+    try:
+        import av
+    except Exception:  # pragma: no cover
+        return None
+    return av
+
+
+def _probe_video_av(video_path: Path) -> VideoMetadata | None:
+    # Reading the container header in-process avoids an ffprobe fork/exec and
+    # JSON round trip. Returns None to fall back to ffprobe whenever PyAV is
+    # missing or cannot make sense of the file.
+    av = _load_av()
+    if av is None:
+        return None
+    try:
+        with av.open(str(video_path)) as container:
+            if not container.streams.video:
+                return None
+            stream = container.streams.video[0]
+            width = int(stream.codec_context.width or 0)
+            height = int(stream.codec_context.height or 0)
+            rate = stream.average_rate or stream.guessed_rate
+            fps = float(rate) if rate else 0.0
+            if stream.duration is not None and stream.time_base is not None:
+                duration_sec = float(stream.duration * stream.time_base)
+            elif container.duration is not None:
+                duration_sec = container.duration / av.time_base
+            else:
+                duration_sec = 0.0
+    except Exception:
+        return None
+
+    if width <= 0 or height <= 0 or duration_sec <= 0:
+        return None
+    return VideoMetadata(width=width, height=height, fps=max(fps, 1.0), duration_sec=duration_sec)
+
+
+def _run_ffprobe_video(video_path: Path) -> VideoMetadata:
     cmd = [
         "ffprobe",
         "-v",
@@ -60,11 +146,11 @@ def probe_video(video_path: Path) -> VideoMetadata:
         "json",
         str(video_path),
     ]
-    proc = subprocess.run(cmd, capture_output=True, text=True)
+    proc = subprocess.run(cmd, capture_output=True)
     if proc.returncode != 0:
-        raise RuntimeError(f"ffprobe failed: {proc.stderr}")
+        raise RuntimeError(f"ffprobe failed: {proc.stderr.decode(errors='replace')}")
 
-    data = json.loads(proc.stdout)
+    data = from_json(proc.stdout)
     stream = (data.get("streams") or [{}])[0]
     fmt = data.get("format", {})
 
@@ -87,7 +173,51 @@ def probe_video(video_path: Path) -> VideoMetadata:
     return VideoMetadata(width=width, height=height, fps=max(fps, 1.0), duration_sec=duration_sec)
 
 
+# SOFn markers carry the frame size; C4 (DHT), C8 (JPG) and CC (DAC) share the range.
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+_JPEG_HEADER_READ_BYTES = 64 * 1024
+
+
+def read_jpeg_size(image_path: Path) -> tuple[int, int] | None:
+    with image_path.open("rb") as f:
+        data = f.read(_JPEG_HEADER_READ_BYTES)
+    if data[:2] != b"\xff\xd8":
+        return None
+
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        if marker in (0xD9, 0xDA):
+            return None
+        segment_len = int.from_bytes(data[pos + 2 : pos + 4], "big")
+        if marker in _JPEG_SOF_MARKERS:
+            if pos + 9 > len(data):
+                return None
+            height = int.from_bytes(data[pos + 5 : pos + 7], "big")
+            width = int.from_bytes(data[pos + 7 : pos + 9], "big")
+            if width <= 0 or height <= 0:
+                return None
+            return width, height
+        pos += 2 + segment_len
+    return None
+
+
 def probe_image_size(image_path: Path) -> tuple[int, int]:
+    # Extracted frames are always JPEG; reading the SOF header avoids an ffprobe
+    # process per upload. Anything unusual still goes through ffprobe.
+    if image_path.suffix.lower() in (".jpg", ".jpeg"):
+        size = read_jpeg_size(image_path)
+        if size is not None:
+            return size
+
     cmd = [
         "ffprobe",
         "-v",
@@ -100,11 +230,11 @@ def probe_image_size(image_path: Path) -> tuple[int, int]:
         "json",
         str(image_path),
     ]
-    proc = subprocess.run(cmd, capture_output=True, text=True)
+    proc = subprocess.run(cmd, capture_output=True)
     if proc.returncode != 0:
-        raise RuntimeError(f"ffprobe failed for image: {proc.stderr}")
+        raise RuntimeError(f"ffprobe failed for image: {proc.stderr.decode(errors='replace')}")
 
-    data = json.loads(proc.stdout)
+    data = from_json(proc.stdout)
     stream = (data.get("streams") or [{}])[0]
     width = int(stream.get("width") or 0)
     height = int(stream.get("height") or 0)
@@ -148,8 +278,12 @@ def extract_frames(
     cmd = [
         "ffmpeg",
         "-y",
+        "-hide_banner",
+        "-nostdin",
         "-loglevel",
         "error",
+        "-threads",
+        "0",
         "-i",
         str(video_path),
         "-vf",
@@ -158,6 +292,8 @@ def extract_frames(
         str(max_frames),
         "-q:v",
         "2",
+        "-threads",
+        "0",
         "-start_number",
         "0",
         frame_pattern,
@@ -165,26 +301,135 @@ def extract_frames(
     run_command(cmd)
 
 
-def count_extracted_frames(frames_dir: Path) -> int:
-    return len(list(frames_dir.glob("*.jpg")))
-
-
-def get_frame_path(frames_dir: Path, frame_index: int) -> Path:
-    frame_path = frames_dir / f"{frame_index:06d}.jpg"
-    if not frame_path.exists():
-        raise FileNotFoundError(str(frame_path))
+def write_blank_frame(frames_dir: Path, width: int, height: int) -> Path:
+    frames_dir.mkdir(parents=True, exist_ok=True)
+    frame_path = frame_path_for(frames_dir, 0)
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-hide_banner",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-f",
+        "lavfi",
+        "-i",
+        f"color=c=black:s={width}x{height}",
+        "-frames:v",
+        "1",
+        str(frame_path),
+    ]
+    run_command(cmd)
     return frame_path
 
 
-async def save_upload_file(upload: UploadFile, output_path: Path) -> None:
+def count_extracted_frames(frames_dir: Path) -> int:
+    with os.scandir(frames_dir) as entries:
+        return sum(1 for entry in entries if entry.name.endswith(".jpg"))
+
+
+def frame_path_for(frames_dir: Path, frame_index: int) -> Path:
+    return frames_dir / f"{frame_index:06d}.jpg"
+
+
+class FrameCache:
+    """Byte-bounded LRU of frame JPEG contents, keyed by path."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max(int(max_bytes), 0)
+        self._lock = Lock()
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+
+    def read(self, frame_path: Path) -> bytes:
+        key = str(frame_path)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return data
+
+        data = frame_path.read_bytes()
+        if len(data) > self.max_bytes:
+            return data
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = data
+                self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+async def save_upload_file(
+    upload: UploadFile,
+    output_path: Path,
+    chunk_bytes: int = DEFAULT_UPLOAD_CHUNK_BYTES,
+) -> None:
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("wb") as f:
+    chunk_bytes = max(int(chunk_bytes), 1)
+    # One worker-thread hop for the whole copy instead of a read hop and a
+    # write hop per chunk through UploadFile's async wrappers.
+    await run_in_threadpool(_copy_upload, upload.file, output_path, chunk_bytes)
+    await upload.close()
+
+
+def _copy_upload(source: BinaryIO, output_path: Path, chunk_bytes: int) -> None:
+    source.seek(0)
+    with output_path.open("wb", buffering=0) as f:
+        if _copy_file_range(source, f):
+            return
+        source.seek(0)
+        f.seek(0)
+        f.truncate()
+        readinto = getattr(source, "readinto", None)
+        if readinto is None:
+            shutil.copyfileobj(source, f, chunk_bytes)
+            return
+        # One reused buffer for the whole copy instead of a fresh bytes
+        # object per chunk; the output is unbuffered so each chunk is written
+        # straight from the buffer.
+        buf = memoryview(bytearray(chunk_bytes))
         while True:
-            chunk = await upload.read(1024 * 1024)
-            if not chunk:
+            n = readinto(buf)
+            if not n:
                 break
-            f.write(chunk)
-    await upload.close()
+            view = buf[:n]
+            while view:
+                view = view[f.write(view) :]
+
+
+def _copy_file_range(source: BinaryIO, dest: BinaryIO) -> bool:
+    # Uploads backed by a real file are copied in the kernel without passing
+    # through Python. A SpooledTemporaryFile still held in memory would be
+    # rolled to disk by fileno(), writing small uploads twice, so in-memory
+    # sources (and filesystems that reject copy_file_range) use the readinto
+    # loop instead.
+    if not hasattr(os, "copy_file_range"):
+        return False
+    if isinstance(getattr(source, "_file", source), io.BytesIO):
+        return False
+    try:
+        src_fd = source.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return False
+    size = os.fstat(src_fd).st_size
+    offset = 0
+    try:
+        while offset < size:
+            copied = os.copy_file_range(src_fd, dest.fileno(), size - offset, offset)
+            if copied == 0:
+                break
+            offset += copied
+    except OSError:
+        return False
+    return offset == size
 
 
 def cleanup_path(path: Path) -> None:
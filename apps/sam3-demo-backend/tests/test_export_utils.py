@@ -56,6 +56,7 @@ def test_export_archive_includes_requested_artifacts(tmp_path: Path) -> None:
         assert "annotations/yolo/labels/000000.txt" in names
         assert "images/000000.jpg" in names
         assert "manifest.json" in names
+        assert zf.getinfo("images/000000.jpg").compress_type == zipfile.ZIP_STORED
 
         coco = json.loads(zf.read("annotations/coco_instances.json"))
         assert len(coco["images"]) == 2
@@ -91,3 +92,35 @@ def test_export_archive_destructive_merge_replaces_group_members(tmp_path: Path)
         annotations = coco["annotations"]
         assert len(annotations) == 1
         assert coco["categories"][0]["name"] == "herd"
+
+
+def test_export_archive_writes_binary_mask_pngs_in_frame_order(tmp_path: Path) -> None:
+    from PIL import Image
+
+    record = _make_record(tmp_path)
+    mask_a = np.zeros((8, 10), dtype=bool)
+    mask_a[1:4, 2:6] = True
+    mask_b = np.zeros((8, 10), dtype=bool)
+    mask_b[5:7, 0:3] = True
+    cached = {0: {1: mask_a, 2: mask_b}, 1: {1: mask_b}, 2: {2: np.zeros((8, 10), dtype=bool)}}
+
+    req = ExportRequest.model_validate(
+        {
+            "formats": ["binary_masks_png"],
+            "merge": {"mode": "none", "groups": []},
+            "scope": {"frame_start": 0, "frame_end": 2, "include_images": False},
+            "auto_propagate_if_incomplete": False,
+        }
+    )
+
+    archive = build_export_archive(record=record, cached_frame_outputs=cached, req=req)
+    with zipfile.ZipFile(io.BytesIO(archive), "r") as zf:
+        mask_names = [name for name in zf.namelist() if name.startswith("masks/")]
+        assert mask_names == [
+            "masks/000000/obj_1.png",
+            "masks/000000/obj_2.png",
+            "masks/000001/obj_1.png",
+        ]
+        decoded = np.array(Image.open(io.BytesIO(zf.read("masks/000000/obj_2.png"))))
+        assert np.array_equal(decoded > 0, mask_b)
+
@@ -1,6 +1,7 @@
 import numpy as np
+from pycocotools import mask as mask_utils
 
-from app.mask_codec import encode_sam3_outputs
+from app.mask_codec import coco_rle_area_bbox, encode_sam3_outputs, masks_to_coco_rle
 
 
 def test_encode_sam3_outputs_with_single_mask() -> None:
@@ -27,3 +28,28 @@ def test_encode_sam3_outputs_with_single_mask() -> None:
 def test_encode_sam3_outputs_with_empty_payload() -> None:
     encoded = encode_sam3_outputs({})
     assert encoded == []
+
+
+def test_masks_to_coco_rle_matches_per_mask_encoding() -> None:
+    rng = np.random.default_rng(0)
+    masks = rng.random((3, 6, 7)) < 0.4
+
+    batched = masks_to_coco_rle(masks)
+    expected = [
+        mask_utils.encode(np.asfortranarray(mask.astype(np.uint8)))["counts"].decode()
+        for mask in masks
+    ]
+    assert [rle["counts"] for rle in batched] == expected
+    assert all(rle["size"] == [6, 7] for rle in batched)
+    assert masks_to_coco_rle(np.zeros((0, 6, 7), dtype=bool)) == []
+
+
+def test_coco_rle_area_bbox_matches_pixel_scan() -> None:
+    masks = np.zeros((2, 6, 7), dtype=bool)
+    masks[0, 1:4, 2:5] = True
+    masks[1, 5, 0] = True
+
+    areas, bboxes = coco_rle_area_bbox(masks_to_coco_rle(masks))
+    assert areas == [9, 1]
+    assert bboxes == [[2.0, 1.0, 3.0, 3.0], [0.0, 5.0, 1.0, 1.0]]
+    assert coco_rle_area_bbox([]) == ([], [])
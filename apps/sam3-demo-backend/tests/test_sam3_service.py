@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import torch
+
 from app.sam3_service import Sam3Service
 from app.session_store import SessionRecord, SessionStore
 
@@ -21,6 +23,7 @@ class _FakePredictor:
         self._session = {"state": state}
         self.model = _FakeModel(propagation_type)
         self.requests: list[dict] = []
+        self.stream_frames = 1
 
     def handle_request(self, request: dict):
         self.requests.append(request)
@@ -32,7 +35,8 @@ class _FakePredictor:
 
     def handle_stream_request(self, request: dict):
         assert request["type"] == "propagate_in_video"
-        yield {"frame_index": 0, "outputs": {}}
+        for frame_index in range(self.stream_frames):
+            yield {"frame_index": frame_index, "outputs": {}}
 
     def _get_session(self, _session_id: str):
         return self._session
@@ -105,6 +109,36 @@ def test_partial_propagation_prefills_missing_cache_entries(tmp_path: Path) -> N
     assert state["cached_frame_outputs"][0] == {"baseline": True}
 
 
+def test_stream_propagation_yields_frames_in_order_and_stops_when_stale(
+    tmp_path: Path,
+) -> None:
+    store, session_id = _make_store_with_session(tmp_path)
+    service = Sam3Service(session_store=store)
+    service.predictor = _FakePredictor(
+        state={"num_frames": 4, "cached_frame_outputs": {}, "action_history": []}
+    )
+    service.predictor.stream_frames = 4
+
+    frames = service.stream_propagation(
+        session_id=session_id,
+        direction="forward",
+        start_frame_index=None,
+        generation=0,
+    )
+    assert [frame_index for frame_index, _ in frames] == [0, 1, 2, 3]
+
+    generation = store.bump_generation(session_id)
+    frames = service.stream_propagation(
+        session_id=session_id,
+        direction="forward",
+        start_frame_index=None,
+        generation=generation,
+    )
+    assert next(frames)[0] == 0
+    store.bump_generation(session_id)
+    assert list(frames) == []
+
+
 def test_text_prompt_reset_first_true_forwards_reset_state_true(tmp_path: Path) -> None:
     store, session_id = _make_store_with_session(tmp_path)
     predictor = _FakePredictor(
@@ -123,3 +157,47 @@ def test_text_prompt_reset_first_true_forwards_reset_state_true(tmp_path: Path)
     add_prompt_requests = [req for req in predictor.requests if req["type"] == "add_prompt"]
     assert len(add_prompt_requests) == 1
     assert add_prompt_requests[0]["reset_state"] is True
+
+
+def test_click_prompt_sends_accumulated_points_as_tensors(tmp_path: Path) -> None:
+    store, session_id = _make_store_with_session(tmp_path)
+    predictor = _FakePredictor(
+        state={"num_frames": 4, "cached_frame_outputs": {1: {}}, "action_history": []}
+    )
+    service = Sam3Service(session_store=store)
+    service.predictor = predictor
+
+    service.add_click_prompt(
+        session_id=session_id, frame_index=1, obj_id=-1, points=[(0.25, 0.5, 1)]
+    )
+    service.add_click_prompt(
+        session_id=session_id, frame_index=1, obj_id=-1, points=[(0.75, 0.125, 0)]
+    )
+
+    request = predictor.requests[-1]
+    assert request["points"].dtype == torch.float32
+    assert request["points"].tolist() == [[0.25, 0.5], [0.75, 0.125]]
+    assert request["point_labels"].dtype == torch.int32
+    assert request["point_labels"].tolist() == [1, 0]
+
+
+def test_text_prompt_skips_reset_until_session_has_state(tmp_path: Path) -> None:
+    store, session_id = _make_store_with_session(tmp_path)
+    predictor = _FakePredictor(
+        state={"num_frames": 4, "cached_frame_outputs": {}, "action_history": []}
+    )
+    service = Sam3Service(session_store=store)
+    service.predictor = predictor
+
+    def reset_count() -> int:
+        return sum(1 for req in predictor.requests if req["type"] == "reset_session")
+
+    service.add_text_prompt(session_id=session_id, frame_index=0, text="car", reset_first=True)
+    assert reset_count() == 0
+
+    service.add_text_prompt(session_id=session_id, frame_index=0, text="dog", reset_first=True)
+    assert reset_count() == 1
+
+    service.reset_session(session_id)
+    service.add_text_prompt(session_id=session_id, frame_index=0, text="cat", reset_first=True)
+    assert reset_count() == 2
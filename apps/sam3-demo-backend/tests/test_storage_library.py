@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
 from pathlib import Path
 
-from app.storage_library import StorageLibrary
+from app.storage_library import StorageLibrary, _timestamp_iso
 
 
 def test_storage_library_register_list_rename_delete(tmp_path: Path) -> None:
@@ -45,3 +46,89 @@ def test_storage_library_register_list_rename_delete(tmp_path: Path) -> None:
 
     status_after_delete = lib.storage_status(tmp_path)
     assert status_after_delete["uploads_count"] == 0
+
+
+def test_storage_library_serves_cached_listing_until_invalidated(tmp_path: Path) -> None:
+    uploads_dir = tmp_path / "uploads"
+    uploads_dir.mkdir(parents=True, exist_ok=True)
+    (uploads_dir / "first.mp4").write_bytes(b"first")
+
+    lib = StorageLibrary(uploads_dir, cache_ttl_sec=3600.0)
+    assert [v.video_id for v in lib.list_videos()] == ["first"]
+    assert lib.storage_status(tmp_path)["uploads_count"] == 1
+
+    (uploads_dir / "second.mp4").write_bytes(b"second")
+    assert [v.video_id for v in lib.list_videos()] == ["first"]
+    assert lib.storage_status(tmp_path)["uploads_count"] == 1
+
+    lib.register_video(video_id="second", file_name="second.mp4", display_name="Second")
+    assert {v.video_id for v in lib.list_videos()} == {"first", "second"}
+    assert lib.storage_status(tmp_path)["uploads_count"] == 2
+
+
+def test_storage_library_reuses_manifest_until_file_changes(
+    tmp_path: Path, monkeypatch
+) -> None:
+    uploads_dir = tmp_path / "uploads"
+    uploads_dir.mkdir(parents=True, exist_ok=True)
+    (uploads_dir / "abc.mp4").write_bytes(b"video")
+
+    lib = StorageLibrary(uploads_dir, cache_ttl_sec=0.0)
+    lib.register_video(video_id="abc", file_name="abc.mp4", display_name="First")
+    assert not (uploads_dir / "library.json.tmp").exists()
+
+    reads = 0
+    original_read = lib._read_manifest_unlocked
+
+    def counting_read():
+        nonlocal reads
+        reads += 1
+        return original_read()
+
+    monkeypatch.setattr(lib, "_read_manifest_unlocked", counting_read)
+    assert lib.list_videos()[0].display_name == "First"
+    assert lib.resolve_video_path("abc") == uploads_dir / "abc.mp4"
+    assert reads == 0
+
+    other = StorageLibrary(uploads_dir)
+    other.rename_video("abc", "Renamed elsewhere")
+    assert lib.list_videos()[0].display_name == "Renamed elsewhere"
+    assert reads == 1
+
+
+def test_timestamp_iso_matches_datetime_isoformat() -> None:
+    for ts in (0.0, 1_700_000_000.0, 1_700_000_000.5, 1_700_000_000.9999996, 1_234_567_890.25):
+        expected = datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+        assert _timestamp_iso(ts) == expected
+
+
+def test_storage_status_picks_up_in_place_growth_after_ttl(tmp_path: Path) -> None:
+    uploads_dir = tmp_path / "uploads"
+    uploads_dir.mkdir(parents=True, exist_ok=True)
+    upload = uploads_dir / "first.mp4"
+    upload.write_bytes(b"first")
+
+    lib = StorageLibrary(uploads_dir, cache_ttl_sec=0.0)
+    assert lib.storage_status(tmp_path)["uploads_bytes"] == len(b"first")
+
+    # Appending to an existing file leaves the directory mtime untouched.
+    with upload.open("ab") as f:
+        f.write(b"-more")
+    status = lib.storage_status(tmp_path)
+    assert status["uploads_count"] == 1
+    assert status["uploads_bytes"] == len(b"first-more")
+
+
+def test_list_videos_rescans_after_ttl(tmp_path: Path) -> None:
+    uploads_dir = tmp_path / "uploads"
+    uploads_dir.mkdir(parents=True, exist_ok=True)
+    upload = uploads_dir / "first.mp4"
+    upload.write_bytes(b"first")
+
+    lib = StorageLibrary(uploads_dir, cache_ttl_sec=0.0)
+    assert [v.size_bytes for v in lib.list_videos()] == [len(b"first")]
+
+    # Neither the directory nor the manifest changes when a file grows.
+    with upload.open("ab") as f:
+        f.write(b"-more")
+    assert [v.size_bytes for v in lib.list_videos()] == [len(b"first-more")]
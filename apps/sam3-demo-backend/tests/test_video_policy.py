@@ -1,4 +1,20 @@
-from app.video_io import compute_processing_fps, is_duration_allowed
+import asyncio
+import io
+import tempfile
+from pathlib import Path
+
+import pytest
+from fastapi import UploadFile
+
+from app import video_io
+from app.video_io import (
+    FrameCache,
+    VideoMetadata,
+    compute_processing_fps,
+    is_duration_allowed,
+    read_jpeg_size,
+    save_upload_file,
+)
 
 
 def test_duration_limit_rejects_over_60_seconds() -> None:
@@ -42,3 +58,88 @@ def test_processing_fps_clamps_requested_fps_to_cap() -> None:
         requested_fps=25.0,
     )
     assert fps == 15.0
+
+
+def test_read_jpeg_size_parses_sof_after_app_segments(tmp_path: Path) -> None:
+    app0 = b"\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    sof2 = b"\xff\xc2\x00\x11\x08" + (360).to_bytes(2, "big") + (640).to_bytes(2, "big")
+    sof2 += b"\x03" + b"\x01\x22\x00\x02\x11\x01\x03\x11\x01"
+    path = tmp_path / "000000.jpg"
+    path.write_bytes(b"\xff\xd8" + app0 + sof2 + b"\xff\xd9")
+    assert read_jpeg_size(path) == (640, 360)
+
+
+def test_read_jpeg_size_returns_none_for_non_jpeg(tmp_path: Path) -> None:
+    path = tmp_path / "000000.jpg"
+    path.write_bytes(b"\x89PNG\r\n\x1a\n")
+    assert read_jpeg_size(path) is None
+
+
+def test_probe_video_reuses_metadata_for_identical_content(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: list[Path] = []
+
+    def fake_ffprobe(video_path: Path) -> VideoMetadata:
+        calls.append(video_path)
+        return VideoMetadata(width=640, height=360, fps=30.0, duration_sec=2.0)
+
+    monkeypatch.setattr(video_io, "_run_ffprobe_video", fake_ffprobe)
+    monkeypatch.setattr(video_io, "_probe_cache", video_io.OrderedDict())
+    payload = b"\x00" * (200 * 1024)
+    first = tmp_path / "a.mp4"
+    second = tmp_path / "b.mp4"
+    first.write_bytes(payload)
+    second.write_bytes(payload)
+
+    assert video_io.probe_video(first) == video_io.probe_video(second)
+    assert calls == [first]
+
+    second.write_bytes(payload[:-1] + b"\x01")
+    video_io.probe_video(second)
+    assert calls == [first, second]
+
+
+def test_frame_cache_evicts_least_recently_used_within_budget(tmp_path: Path) -> None:
+    frames = []
+    for idx in range(3):
+        path = tmp_path / f"{idx:06d}.jpg"
+        path.write_bytes(bytes([idx]) * 10)
+        frames.append(path)
+    cache = FrameCache(max_bytes=20)
+
+    assert cache.read(frames[0]) == b"\x00" * 10
+    cache.read(frames[1])
+    cache.read(frames[0])
+    cache.read(frames[2])
+    frames[0].unlink()
+    frames[1].unlink()
+
+    assert cache.read(frames[0]) == b"\x00" * 10
+    with pytest.raises(FileNotFoundError):
+        cache.read(frames[1])
+
+
+@pytest.mark.parametrize("rolled_to_disk", [False, True])
+def test_save_upload_file_copies_spooled_upload(tmp_path: Path, rolled_to_disk: bool) -> None:
+    payload = bytes(range(256)) * 1000 + b"tail"
+    spooled = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+    spooled.write(payload)
+    if rolled_to_disk:
+        spooled.rollover()
+    output_path = tmp_path / "out" / "video.mp4"
+
+    upload = UploadFile(file=spooled, filename="video.mp4")
+    asyncio.run(save_upload_file(upload, output_path, chunk_bytes=4096))
+
+    assert output_path.read_bytes() == payload
+
+
+def test_save_upload_file_copies_source_without_fileno(tmp_path: Path) -> None:
+    payload = bytes(range(256)) * 100 + b"tail"
+    output_path = tmp_path / "video.mp4"
+
+    upload = UploadFile(file=io.BytesIO(payload), filename="video.mp4")
+    asyncio.run(save_upload_file(upload, output_path, chunk_bytes=4096))
+
+    assert output_path.read_bytes() == payload
@@ -6,6 +6,7 @@ import {
   OperationResponse,
   PromptResponse,
   PropagationFrameEvent,
+  PropagationFramesEvent,
   PropagationStart,
   StorageStatusResponse,
   StoredVideoInfo,
@@ -244,6 +245,12 @@ export function openPropagationSocket(
         handlers.onFrame(msg as unknown as PropagationFrameEvent);
         return;
       }
+      if (msg.type === "propagation_frames") {
+        for (const frame of (msg as unknown as PropagationFramesEvent).frames) {
+          handlers.onFrame({ type: "propagation_frame", ...frame });
+        }
+        return;
+      }
       if (msg.type === "propagation_done") {
         handlers.onDone();
         return;
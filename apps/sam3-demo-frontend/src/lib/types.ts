@@ -73,6 +73,11 @@ export interface PropagationFrameEvent {
   objects: ObjectOutput[];
 }
 
+export interface PropagationFramesEvent {
+  type: "propagation_frames";
+  frames: Array<Omit<PropagationFrameEvent, "type">>;
+}
+
 export interface WsErrorPayload {
   type?: string;
   code: string;